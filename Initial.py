@@ -1,22 +1,34 @@
 import os
 import time
 import threading
-import queue
 import azure.cognitiveservices.speech as speechsdk
-import pyaudio
-import tempfile
-from pyannote.audio import Pipeline
+from capture import MicrophoneCapture
+from alignment import SpeakerLabeller
+from transcript_store import TranscriptStore
+from transcript_archive import TranscriptArchive
+from diarization import diarize_waveform
+from recorder import AudioRecorder
+from ring_buffer import BroadcastRingBuffer
+from session_runner import SessionRunner
+from streaming_diarizer import StreamingDiarizer
 from dotenv import load_dotenv
 import warnings
-import wave
 warnings.filterwarnings("ignore")
 
 # Load environment variables from .env file
 load_dotenv()
 
+# The session audio is also saved here, None to not record it
+RECORDING_FILE = "session.flac"
+# Utterances are archived here for later search, None to not archive them
+ARCHIVE_FILE = "transcripts.db"
+
 # Global variables
-audio_queue = queue.Queue()  # Initialize the audio queue
-transcripts = []  # To keep track of transcripts
+# One microphone capture shared by Azure, the diarizer and the recorder, each through its own cursor.
+# Sample positions in it are the one clock for all of them
+audio_buffer = BroadcastRingBuffer(seconds=30)
+session = SessionRunner()  # Stop event shared by the capture, Azure and diarization threads
+transcripts = TranscriptStore()  # Utterances with numeric offsets, interned speakers and text
 last_transcribed_text = ""  # Variable to track the last transcribed text
 
 # Azure Speech SDK setup
@@ -45,7 +57,8 @@ def conversation_transcriber_transcribed_cb(evt: speechsdk.SpeechRecognitionEven
 
     if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
         # Store the recognized text and its offset
-        transcripts.append((evt.result.text, evt.result.offset, evt.result.speaker_id))  # Save transcript, timestamp, and speaker ID
+        # Azure counts the offset from the start of the pushed stream, i.e. on the shared sample clock
+        transcripts.append_result(evt.result)  # Save transcript, offsets and speaker ID
         
         # Check if the recognized text is different from the last one
         if evt.result.text != last_transcribed_text:
@@ -68,55 +81,38 @@ def conversation_transcriber_session_started_cb(evt: speechsdk.SessionEventArgs)
     print('SessionStarted event')
 
 # Real-time audio capture
-def capture_audio_to_queue():
-    p = pyaudio.PyAudio()
-    stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=1024)
+def capture_audio_to_buffer():
+    # Opened at the device's native rate and resampled to 16 kHz
+    stream = MicrophoneCapture()
 
     print("Capturing audio... Press Ctrl + C to stop.")
 
     try:
-        while True:
+        while not session.stopped:
             audio_data = stream.read(1024)
-            audio_queue.put(audio_data)  # Enqueue audio data for diarization
-    except KeyboardInterrupt:
-        stream.stop_stream()
+            audio_buffer.write(audio_data)  # Copy into the shared buffer, the only copy of the capture
+    finally:
         stream.close()
-        p.terminate()
+        audio_buffer.close()
         print("Audio capture ended.")
 
+# Feed Azure from its cursor over the shared capture
+def push_audio_to_azure(cursor, push_stream):
+    while True:
+        views = cursor.peek(min_samples=1600, timeout=session.poll_interval)  # 100 ms at a time
+        if not views:
+            if cursor.closed:
+                break
+            continue
+        for view in views:
+            push_stream.write(view.tobytes())  # The SDK takes bytes
+        cursor.consume(sum(len(view) for view in views))
+    push_stream.close()  # Tells Azure the audio has ended
+
 # Diarization function
 def diarize_audio_with_pyannote(audio_chunk):
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1",use_auth_token=True)
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_audio_file:
-        with wave.open(temp_audio_file.name, 'wb') as wf:
-            wf.setnchannels(1)  # Mono channel
-            wf.setsampwidth(2)  # Sample width (bytes)
-            wf.setframerate(16000)  # Frame rate (Hz)
-            wf.writeframes(audio_chunk)  # Write audio data to temp file
-
-        # Apply the pipeline to the saved audio file to obtain speaker segments
-        diarization = pipeline(temp_audio_file.name)
-
-        # Extract speaker segments and labels
-        speaker_info = []
-        for segment, track, label in diarization.itertracks(yield_label=True):
-            speaker_info.append({
-                "start": segment.start,
-                "end": segment.end,
-                "speaker": label
-            })
-    
-    return speaker_info
-
-# Format and print output
-def format_output(transcripts, speaker_info):
-    output = []
-    for transcript, timestamp, speaker_id in transcripts:
-        # Match the transcript with the speaker based on timing
-        for info in speaker_info:
-            if timestamp >= info["start"] and timestamp <= info["end"]:
-                output.append(f"Speaker {info['speaker']:02}: {transcript}")
-    return "\n".join(output)
+    # Diarize the chunk in memory, no temporary WAV file is written
+    return diarize_waveform(audio_chunk, "pyannote/speaker-diarization-3.1")
 
 # Main function to run transcription and diarization
 def main():
@@ -124,16 +120,17 @@ def main():
     if not speech_config:
         return
 
-    audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
+    # Azure gets the same audio as the diarizer instead of opening the microphone itself
+    stream_format = speechsdk.audio.AudioStreamFormat(samples_per_second=audio_buffer.sample_rate,
+                                                      bits_per_sample=16, channels=1)
+    push_stream = speechsdk.audio.PushAudioInputStream(stream_format=stream_format)
+    audio_config = speechsdk.audio.AudioConfig(stream=push_stream)
     conversation_transcriber = speechsdk.transcription.ConversationTranscriber(speech_config=speech_config, audio_config=audio_config)
 
-    transcribing_stop = False
-
     # Define stop callback
     def stop_cb(evt: speechsdk.SessionEventArgs):
         print('CLOSING on {}'.format(evt))
-        nonlocal transcribing_stop
-        transcribing_stop = True
+        session.stop()
 
     # Connect callbacks to the events fired by the conversation transcriber
     conversation_transcriber.transcribed.connect(conversation_transcriber_transcribed_cb)
@@ -146,24 +143,59 @@ def main():
     conversation_transcriber.session_stopped.connect(stop_cb)
     conversation_transcriber.canceled.connect(stop_cb)
 
+    # Every consumer gets its cursor before the capture starts, so all of them begin at sample 0
+    azure_cursor = audio_buffer.cursor("azure")
+    diarizer_cursor = audio_buffer.cursor("diarizer")
+    archive = None
+    if ARCHIVE_FILE:
+        archive = TranscriptArchive(ARCHIVE_FILE)
+        archive.record(transcripts, name=RECORDING_FILE)
+    recorder = None
+    if RECORDING_FILE:
+        recorder = AudioRecorder(RECORDING_FILE, sample_rate=audio_buffer.sample_rate,
+                                 source=audio_buffer.cursor("recorder"))
+
     # Start the transcription
     conversation_transcriber.start_transcribing_async()
+    azure_thread = threading.Thread(target=push_audio_to_azure, args=(azure_cursor, push_stream))
+    azure_thread.start()
 
     # Start audio capture in a separate thread
-    audio_capture_thread = threading.Thread(target=capture_audio_to_queue)
+    audio_capture_thread = threading.Thread(target=capture_audio_to_buffer)
     audio_capture_thread.start()
 
-    # Continuously process audio chunks from the queue
-    while not transcribing_stop:
-        if not audio_queue.empty():
-            audio_chunk = audio_queue.get()
-            speaker_info = diarize_audio_with_pyannote(audio_chunk)  # Process the audio chunk for diarization
-            # Combine results and print
-            final_output = format_output(transcripts, speaker_info)
-            if final_output:  # Print only if there's output
-                print(final_output)  # Print combined results
-
-    conversation_transcriber.stop_transcribing_async()
+    # One diarizer for the whole session keeps speaker labels consistent across chunks
+    diarizer = StreamingDiarizer("pyannote/speaker-diarization-3.1")
+
+    # Feed views over the new audio to the diarizer and print the utterances it has labelled
+    labeller = SpeakerLabeller()
+
+    def process_audio(views):
+        speaker_info = []
+        for view in views:
+            speaker_info += diarizer.feed(view)  # Finalized speaker turns, if any
+        # Label the utterances the diarizer is done with; the others wait for later turns
+        final_output = labeller.label(transcripts, speaker_info, diarizer.committed)
+        if final_output:  # Print only if there's output
+            print(final_output)  # Print combined results
+
+    # Block on the ring buffer until the session stops (SDK event or Ctrl + C)
+    session.run_buffer(diarizer_cursor, process_audio)
+
+    audio_capture_thread.join()
+    azure_thread.join()
+    conversation_transcriber.stop_transcribing_async().get()  # The last utterances are in the store after this
+    # Diarize the audio still in the window and print the utterances left
+    final_output = labeller.label(transcripts, diarizer.flush())
+    if final_output:
+        print(final_output)
+    if recorder:
+        recorder.close()
+        print(f"Saved {recorder.duration:.1f}s of audio to {', '.join(recorder.files)}")
+    print(f"Audio buffer: {audio_buffer.stats()}")
+    if archive:
+        archive.close()
+        print(f"Archived {archive.written} utterances to {ARCHIVE_FILE}")
 
 # Main execution
 if __name__ == "__main__":
@@ -0,0 +1,94 @@
+import re
+from collections import namedtuple
+
+# The phrases find_action_items looked for
+TRIGGERS = ("do", "follow", "submit", "review", "check", "ensure", "make sure to", "you must", "please")
+
+# start and end are seconds from the start of the session
+ActionItem = namedtuple("ActionItem", "text speaker_id start end trigger")
+
+# Words and sentence ends; one pass over the text, nothing to backtrack into
+_TOKEN = re.compile(r"[\w']+|[.!?]")
+
+
+class ActionItemScanner:
+    """Finds action items in utterances as they are transcribed.
+
+    An item starts at a trigger phrase and runs to the end of its sentence.
+    Whisper and wav2vec2 output often has no punctuation, so an item also
+    ends after max_words words or at the end of the utterance. Each
+    utterance is scanned once, token by token: the cost is linear in its
+    length whatever the punctuation.
+
+    Usage:
+        scanner = ActionItemScanner()
+        for item in scanner.scan("please send the slides before friday", "Guest-1", 12.0, 15.5):
+            print(item.speaker_id, item.text)
+    """
+
+    def __init__(self, triggers=TRIGGERS, max_words=30):
+        self.max_words = max_words
+        # Trigger phrases as word tuples, grouped by first word, longest first
+        self._triggers = {}
+        for trigger in triggers:
+            words = tuple(trigger.lower().split())
+            if not words:
+                raise ValueError(f"empty action item trigger: {trigger!r}")
+            self._triggers.setdefault(words[0], []).append(words)
+        for phrases in self._triggers.values():
+            phrases.sort(key=len, reverse=True)
+
+    def scan(self, text, speaker_id=None, start=None, end=None):
+        """Returns the action items in one utterance.
+
+        Azure gives no word timings, so an item's start and end are
+        interpolated from its position in the utterance.
+        """
+        tokens = [(match.group().lower(), match.start(), match.end()) for match in _TOKEN.finditer(text)]
+        items = []
+        i = 0
+        while i < len(tokens):
+            trigger = self._match_trigger(tokens, i)
+            if trigger is None:
+                i += 1
+                continue
+
+            # Run to the sentence end, the word cap or the end of the utterance
+            last = i + len(trigger) - 1
+            words = len(trigger)
+            while last + 1 < len(tokens) and words < self.max_words:
+                last += 1
+                if tokens[last][0] in ".!?":
+                    break
+                words += 1
+
+            first_char, last_char = tokens[i][1], tokens[last][2]
+            items.append(ActionItem(text[first_char:last_char], speaker_id,
+                                    self._interpolate(first_char, text, start, end),
+                                    self._interpolate(last_char, text, start, end),
+                                    " ".join(trigger)))
+            i = last + 1
+        return items
+
+    def scan_utterance(self, utterance):
+        """scan() for anything with text, speaker_id, start and end, like orchestrator.Transcribed."""
+        return self.scan(utterance.text, utterance.speaker_id, utterance.start, utterance.end)
+
+    def _match_trigger(self, tokens, i):
+        for phrase in self._triggers.get(tokens[i][0], ()):
+            if tuple(token[0] for token in tokens[i:i + len(phrase)]) == phrase:
+                return phrase
+        return None
+
+    @staticmethod
+    def _interpolate(position, text, start, end):
+        if start is None:
+            return None
+        if end is None or not text:
+            return start
+        return start + (end - start) * position / len(text)
+
+
+def find_action_items(text, triggers=TRIGGERS, max_words=30):
+    """Returns the action item texts in a string, like the regex it replaces."""
+    return [item.text for item in ActionItemScanner(triggers, max_words).scan(text)]
@@ -0,0 +1,184 @@
+from bisect import bisect_left, bisect_right
+from heapq import heappop, heappush
+
+
+def turns_from_annotation(diarization):
+    """Converts a pyannote diarization result into a list of speaker turn dicts."""
+    speaker_info = []
+    for segment, track, label in diarization.itertracks(yield_label=True):
+        speaker_info.append({
+            "start": segment.start,
+            "end": segment.end,
+            "speaker": label
+        })
+    return speaker_info
+
+
+def _overlapping(starts, ends, intervals, touching):
+    """Sweeps (start, end) intervals in start order, yielding (index, candidate turn indices).
+
+    Turns that started by the interval's start wait in a heap keyed by their
+    end and leave it once they end before that start, so each turn is pushed
+    and popped once. The candidates are the turns in the heap plus those
+    starting inside the interval: every one of them overlaps it (touching
+    counts if `touching`), so a long turn costs nothing extra.
+    """
+    active = []
+    p = 0
+    for q in sorted(range(len(intervals)), key=lambda q: intervals[q][0]):
+        start, end = intervals[q]
+        while p < len(starts) and starts[p] <= start:
+            heappush(active, (ends[p], p))
+            p += 1
+        # Turns ended before this interval cannot overlap it or any later one
+        while active and (active[0][0] < start if touching else active[0][0] <= start):
+            heappop(active)
+        later = bisect_right(starts, end, p) if touching else bisect_left(starts, end, p)
+        yield q, [i for _, i in active] + list(range(p, later))
+
+
+class SpeakerTimeline:
+    """Speaker turns sorted once by start time for fast overlap lookups."""
+
+    def __init__(self, speaker_info):
+        self.turns = sorted(speaker_info, key=lambda info: info["start"])
+        self.starts = [info["start"] for info in self.turns]
+        self.ends = [info["end"] for info in self.turns]
+
+    def extend(self, speaker_info):
+        """Adds turns; cheap when they start after the ones already there, as a live diarizer's do."""
+        speaker_info = sorted(speaker_info, key=lambda info: info["start"])
+        if speaker_info and self.starts and speaker_info[0]["start"] < self.starts[-1]:
+            self.__init__(self.turns + speaker_info)
+            return
+        self.turns += speaker_info
+        self.starts += [info["start"] for info in speaker_info]
+        self.ends += [info["end"] for info in speaker_info]
+
+    def speakers_for(self, intervals):
+        """Returns the speaker overlapping each (start, end) interval the longest, or None.
+
+        A point in time (end None) gets the speaker whose turn contains it.
+        One sweep over the sorted intervals and turns: O((N + M) log M).
+        """
+        intervals = [(start, start if end is None or end < start else end) for start, end in intervals]
+        speakers = [None] * len(intervals)
+        for q, candidates in _overlapping(self.starts, self.ends, intervals, touching=True):
+            start, end = intervals[q]
+            # Longest overlap wins, the later turn on ties
+            best = max(candidates, default=None,
+                       key=lambda i: (min(end, self.ends[i]) - max(start, self.starts[i]), i))
+            if best is not None:
+                speakers[q] = self.turns[best]["speaker"]
+        return speakers
+
+    def speaker_at(self, start, end=None):
+        """Returns the speaker overlapping [start, end] the longest, or None; use speakers_for() for many."""
+        return self.speakers_for([(start, end)])[0]
+
+
+class SpeakerLabeller:
+    """Labels the utterances of a live TranscriptStore with the turns a StreamingDiarizer finalizes.
+
+    Finalized turns are kept for the session, so an utterance spanning
+    several diarization steps still gets the speaker overlapping it the
+    longest. Each utterance is labelled once, after the diarizer has
+    committed past its end.
+    """
+
+    def __init__(self):
+        self.timeline = SpeakerTimeline([])
+        self._longest = 0.0   # Longest turn so far: no earlier turn can reach an utterance further back
+        self._next = 0        # Store index of the first utterance not labelled yet
+
+    def label(self, transcripts, speaker_info, committed=None):
+        """Adds finalized turns and returns "Speaker X: text" lines for the utterances now diarized.
+
+        Args:
+            transcripts (TranscriptStore): The session's utterances.
+            speaker_info (list): Turns finalized since the last call.
+            committed (float): Time up to which the diarizer has emitted every turn
+                (StreamingDiarizer.committed); None labels every utterance left,
+                e.g. after StreamingDiarizer.flush().
+        """
+        self.timeline.extend(speaker_info)
+        self._longest = max([self._longest] + [info["end"] - info["start"] for info in speaker_info])
+
+        ready = []
+        for text, start, end, _ in transcripts.snapshot()[self._next:].rows():
+            if committed is not None and end > committed:
+                break   # Utterances arrive in start order: the ones after it are not diarized yet either
+            ready.append((text, start, end))
+        self._next += len(ready)
+        if not ready:
+            return ""
+
+        # Only the turns that can overlap these utterances
+        timeline = self.timeline
+        lo = bisect_left(timeline.starts, min(start for _, start, _ in ready) - self._longest)
+        hi = bisect_right(timeline.starts, max(end for _, _, end in ready))
+        speakers = SpeakerTimeline(timeline.turns[lo:hi]).speakers_for([(start, end) for _, start, end in ready])
+        return "\n".join(f"Speaker {speaker}: {text}" for (text, _, _), speaker in zip(ready, speakers)
+                         if speaker is not None)
+
+
+def assign_speakers(intervals, speaker_info):
+    """Returns the best overlapping speaker (or None) for each (start, end) interval."""
+    return SpeakerTimeline(speaker_info).speakers_for(intervals)
+
+
+def assign_words(words, speaker_info):
+    """Labels Whisper word timestamps with speakers in one sweep over both time-sorted lists.
+
+    Each turn enters the active set when the words reach its start and
+    leaves it once a word starts after its end, so a long turn is handled
+    once instead of being rescanned for every word.
+
+    Args:
+        words (list): Whisper word dicts with "word", "start" and "end", in time order.
+        speaker_info (list): Speaker turn dicts with "start", "end" and "speaker".
+
+    Returns:
+        list: (start, end, speaker, word) tuples. Words falling between turns keep
+        the previous word's speaker.
+    """
+    timeline = SpeakerTimeline(speaker_info)
+    intervals = [(word["start"], word["end"]) for word in words]
+    labelled = []
+    speaker = None
+    for q, candidates in _overlapping(timeline.starts, timeline.ends, intervals, touching=False):
+        start, end = intervals[q]
+        best_overlap = 0.0
+        # The earliest turn wins ties
+        for i in sorted(candidates):
+            overlap = min(end, timeline.ends[i]) - max(start, timeline.starts[i])
+            if overlap > best_overlap:
+                speaker = timeline.turns[i]["speaker"]
+                best_overlap = overlap
+        labelled.append((start, end, speaker, words[q]["word"]))
+    return labelled
+
+
+def group_utterances(labelled_words):
+    """Joins consecutive words of the same speaker into (start, end, speaker, text) utterances."""
+    utterances = []
+    for start, end, speaker, word in labelled_words:
+        if utterances and utterances[-1][2] == speaker:
+            first_start, _, _, text = utterances[-1]
+            utterances[-1] = (first_start, end, speaker, text + word)
+        else:
+            utterances.append((start, end, speaker, word))
+    return [(start, end, speaker, text.strip()) for start, end, speaker, text in utterances]
+
+
+# Format and print output
+def format_output(transcripts, speaker_info):
+    """Labels each (text, timestamp, ...) transcript with the speaker talking at that time."""
+    transcripts = list(transcripts)
+    speakers = SpeakerTimeline(speaker_info).speakers_for([(transcript[1], None) for transcript in transcripts])
+    output = []
+    for transcript, speaker in zip(transcripts, speakers):
+        text = transcript[0]
+        if speaker is not None:
+            output.append(f"Speaker {speaker}: {text}")
+    return "\n".join(output)
@@ -1,13 +1,17 @@
 import os
 import queue
+import asyncio
 import azure.cognitiveservices.speech as speechsdk
 from datetime import datetime
-import openai
 from pyannote.audio import Pipeline
+from transcript_store import TranscriptStore
+from summarizer import summarize_transcriptions
+from transcript_archive import TranscriptArchive
+from date_extraction import find_dates
+from action_items import ActionItemScanner
+from orchestrator import SessionOrchestrator, StageResult, Transcribed
 from dotenv import load_dotenv
 import warnings
-import re
-import dateparser
 
 
 warnings.filterwarnings("ignore")
@@ -19,9 +23,14 @@ load_dotenv()
 '''processing the audio chunks in a queue'''
 audio_queue = queue.Queue()  
 '''keeping track of the transcripts in a list for further actions'''
-transcripts = []  
+transcripts = TranscriptStore()  # Utterances with numeric offsets, interned speakers and text
 last_transcribed_text = ""  # Variable to track the last transcribed text
 
+# How many utterances each post-processing stage may handle at the same time
+STAGE_CONCURRENCY = {"dates": 2, "action_items": 1}
+# Utterances are archived here for later search, None to not archive them
+ARCHIVE_FILE = "transcripts.db"
+
 
 #This function is essential for initializing the Azure Speech SDK with the correct API keys and settings before you start transcription.
 def setup_speech_config():
@@ -54,20 +63,6 @@ def conversation_transcriber_recognition_canceled_cb(evt: speechsdk.SessionEvent
 def conversation_transcriber_session_stopped_cb(evt: speechsdk.SessionEventArgs):
     print('SessionStopped event')
 
-#A callback function that handles the event when Azure successfully transcribes speech to text.
-def conversation_transcriber_transcribed_cb(evt: speechsdk.SpeechRecognitionEventArgs):
-    global last_transcribed_text  # Use the global variable
-
-    if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-        pc_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        transcripts.append((evt.result.text, pc_time, evt.result.speaker_id))
-        
-        if evt.result.text != last_transcribed_text:
-            print(f'[{pc_time}] Speaker ID({evt.result.speaker_id}): {evt.result.text}')
-            last_transcribed_text = evt.result.text
-    elif evt.result.reason == speechsdk.ResultReason.NoMatch:
-        pass  # No action needed
-
 def conversation_transcriber_session_started_cb(evt: speechsdk.SessionEventArgs):
     print('SessionStarted event')
 
@@ -97,74 +92,44 @@ This function helps in identifying which speaker is talking at different times i
     
     return speaker_info'''
 
-# This function prepares a human-readable version of the conversation with speaker labels, making it easier to understand the flow of the conversation.
-def format_output(transcripts, speaker_info):
-    output = []
-    for transcript, timestamp,in transcripts:
-        for info in speaker_info:
-            if timestamp >= info["start"] and timestamp <= info["end"]:
-                output.append(f"Speaker {info['speaker']:02}: {transcript}")
-    return "\n".join(output)
-
-# Function to summarize transcriptions using OpenAI API 
-def summarize_transcriptions(transcripts):
-    combined_transcript = "\n".join([f"Speaker {speaker_id}: {text}" for text, _, speaker_id in transcripts])
-    
-    # Explicitly inform the model if it's a monologue or dialogue
-    if len(set([speaker_id for _, _, speaker_id in transcripts])) == 1:
-
-        combined_transcript = "This is a monologue. Here is the transcript:\n" + combined_transcript
-    else:
-       
-        combined_transcript = "This is a conversation. Here is the transcript:\n" + combined_transcript
-
-    openai.api_key = os.getenv('AI_API_KEY')
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini", 
-            messages=[
-                {"role": "user", "content": f"Please summarize the following conversation:\n\n{combined_transcript}"}
-            ]
-        )
-        summary = response['choices'][0]['message']['content']
-        return summary
-    except Exception as e:
-        print(f"Error during summarization: {e}")
-        return None
 
-# Function to find dates in the text
-def find_dates_in_text(text):
-    # This regex handles multiple formats, including "21st May 2003" and "first September in the year of 1995"
-    date_regex = r'\b(?:\d{1,2}(?:st|nd|rd|th)? [A-Za-z]+ \d{4}|\d{1,2} [A-Za-z]+ \d{4}|\b[A-Za-z]+ \d{1,2},? \d{4}|first? of [A-Za-z]+ in the year of \d{4})\b | \b\d{2}/\d{2}/\d{4}\b'
-
-
-    matches = re.findall(date_regex, text)
-    found_dates = []
-
-    for match in matches:
-        if isinstance(match, str):  # Ensure match is a string
-            # Remove ordinal suffix (st, nd, rd, th) if present, to aid date parsing
-            match = re.sub(r'(\d{1,2})(st|nd|rd|th)', r'\1', match)
-            # Replace "in the year of" to create a standard format
-            match = match.replace("in the year of", "").strip()
-            # Parse the cleaned date string
-            parsed_date = dateparser.parse(match)
-            if parsed_date:
-                found_dates.append(parsed_date)
-    
-    return found_dates
+# Runs the live session: SDK events, printing and per-utterance post-processing all go through one asyncio loop
+async def run_session(conversation_transcriber):
+    global last_transcribed_text
 
+    orchestrator = SessionOrchestrator()
+    orchestrator.add_stage("dates", find_dates, STAGE_CONCURRENCY["dates"])
+    # Action items keep the speaker and time of their utterance, so this stage gets the whole event
+    orchestrator.add_stage("action_items", ActionItemScanner().scan_utterance, STAGE_CONCURRENCY["action_items"],
+                           with_event=True)
+    orchestrator.attach(conversation_transcriber)
+    orchestrator.start()
 
+    # Start the transcription
+    conversation_transcriber.start_transcribing_async()
 
-# Function to find action items in the text
+    print("Recording... Press Enter to stop.")
+    orchestrator.stop_on_enter()
 
-def find_action_items(text):
-    # Regex to match imperative verbs or common action phrases and stop at sentence-ending punctuation
-    action_item_regex = r'\b(?:do|follow|submit|review|check|ensure|make sure to|you must|please)\b.*?[.!?]'
-    
-    matches = re.findall(action_item_regex, text, re.IGNORECASE)  # Find all action-related sentences
-    return matches
+    dates_found = []
+    action_items_found = []
+    async for event in orchestrator.events():
+        if isinstance(event, Transcribed):
+            pc_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            transcripts.append(event.text, event.start, event.end, event.speaker_id)
 
+            if event.text != last_transcribed_text:
+                print(f'[{pc_time}] Speaker ID({event.speaker_id}): {event.text}')
+                last_transcribed_text = event.text
+        elif isinstance(event, StageResult):
+            if event.stage == "dates":
+                dates_found += event.result
+            else:
+                for item in event.result:
+                    print(f"Action item ({item.speaker_id}): {item.text}")
+                action_items_found += event.result
+
+    return dates_found, action_items_found
 
 
 def main():
@@ -175,46 +140,34 @@ def main():
     audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
     conversation_transcriber = speechsdk.transcription.ConversationTranscriber(speech_config=speech_config, audio_config=audio_config)
 
-    transcribing_stop = False
-
-    # Define stop callback
-    def stop_cb(evt: speechsdk.SessionEventArgs):
-        print('CLOSING on {}'.format(evt))
-        nonlocal transcribing_stop
-        transcribing_stop = True
-
     # Connect callbacks to the events fired by the conversation transcriber
-    conversation_transcriber.transcribed.connect(conversation_transcriber_transcribed_cb)
     conversation_transcriber.session_started.connect(conversation_transcriber_session_started_cb)
     conversation_transcriber.session_stopped.connect(conversation_transcriber_session_stopped_cb)
     conversation_transcriber.canceled.connect(conversation_transcriber_recognition_canceled_cb)
 
-    # Stop transcribing on either session stopped or canceled events
-    conversation_transcriber.session_stopped.connect(stop_cb)
-    conversation_transcriber.canceled.connect(stop_cb)
+    # Every utterance appended to the transcripts is also queued for the archive
+    archive = TranscriptArchive(ARCHIVE_FILE) if ARCHIVE_FILE else None
+    if archive:
+        archive.record(transcripts, name="asr")
 
-    # Start the transcription
-    conversation_transcriber.start_transcribing_async()
+    # Transcribed, session stopped and canceled events are handled by the session loop
+    dates_found, action_items_found = asyncio.run(run_session(conversation_transcriber))
 
-    print("Recording... Press Enter to stop.")
-
-    # Wait for user input to stop
-    input("Press Enter to stop...")  # Replace keyboard wait with input
-
-    # Stop the Azure Speech SDK transcription
+    # Enter stops the transcription inside the session; this covers a session the SDK ended itself
     conversation_transcriber.stop_transcribing_async().get()  # Wait for the stop to complete
+    if archive:
+        archive.close()
 
-    full_transcript_text = " ".join([t[0] for t in transcripts])  # Combine all transcribed text
-    dates_found = find_dates_in_text(full_transcript_text)
     if dates_found:
         print("\nDates found in conversation:")
         for date in dates_found:
             print(date.strftime("%Y-%m-%d"))
 
-    action_items_found = find_action_items(full_transcript_text)
-    print("Action items found:", action_items_found)
+    if action_items_found:
+        print("\nAction items found:")
+        for item in action_items_found:
+            print(f"[{item.start:.1f}s] Speaker {item.speaker_id}: {item.text}")
 
-    
     summary = summarize_transcriptions(transcripts)
     if summary:
         print("\nSummary of the conversation:")
@@ -1,38 +1,38 @@
-import pyaudio
-import wave
 import threading
+from capture import MicrophoneCapture
+from recorder import AudioRecorder
 
-def record_audio_until_keypress(filename):
+def record_audio_until_keypress(filename, segment_minutes=None):
     """Records audio from the microphone until Enter is pressed and saves it to a file.
 
+    The audio is written to disk while it is recorded, so memory use does not
+    grow with the length of the recording.
+
     Args:
-        filename (str): The name of the file to save the recording.
+        filename (str): The name of the file to save the recording. A .flac name records
+            lossless FLAC, a .opus name Opus, instead of WAV.
+        segment_minutes (float): Start a new file every N minutes, for all-day capture.
+
+    Returns:
+        list: The files written.
     """
     # Set the parameters for recording
-    FORMAT = pyaudio.paInt16  # Audio format (16-bit PCM)
-    CHANNELS = 1              # Number of channels (1 for mono)
-    RATE = 44100              # Sample rate (samples per second)
+    RATE = 16000              # Sample rate of the file, what the ASR and diarization models use
     CHUNK = 1024              # Buffer size (number of frames per buffer)
 
-    # Create a PyAudio object
-    p = pyaudio.PyAudio()
+    # Open the microphone at its native rate; the capture resamples it to 16 kHz mono
+    stream = MicrophoneCapture(sample_rate=RATE, frames_per_buffer=CHUNK)
 
-    # Open a stream for recording
-    stream = p.open(format=FORMAT,
-                    channels=CHANNELS,
-                    rate=RATE,
-                    input=True,
-                    frames_per_buffer=CHUNK)
+    # Writes each buffer to disk on its own thread as it arrives
+    recorder = AudioRecorder(filename, sample_rate=RATE, segment_minutes=segment_minutes)
 
     print("Recording... Press Enter to stop.")
 
-    frames = []
-
     # Function to record audio
     def record():
         while not stop_event.is_set():
             data = stream.read(CHUNK)
-            frames.append(data)
+            recorder.write(data)
 
     # Create a thread to record audio in the background
     stop_event = threading.Event()
@@ -47,16 +47,12 @@ def record_audio_until_keypress(filename):
     print("Recording finished.")
 
     # Stop and close the stream
-    stream.stop_stream()
     stream.close()
-    p.terminate()
-
-    # Save the recorded audio to a WAV file
-    with wave.open(filename, 'wb') as wf:
-        wf.setnchannels(CHANNELS)
-        wf.setsampwidth(p.get_sample_size(FORMAT))
-        wf.setframerate(RATE)
-        wf.writeframes(b''.join(frames))
+
+    # Write what is still queued and patch the WAV header
+    recorder.close()
+    print(f"Saved {recorder.duration:.1f}s of audio to {', '.join(recorder.files)}")
+    return recorder.files
 
 # Usage example
 if __name__ == "__main__":
@@ -3,12 +3,11 @@ import threading
 import queue
 import azure.cognitiveservices.speech as speechsdk
 from datetime import datetime
-import openai
-from pyannote.audio import Pipeline
+from transcript_store import TranscriptStore
+from summarizer import summarize_transcriptions
+from diarization import diarize_waveform
 from dotenv import load_dotenv
-import tempfile
 import warnings
-import wave
 import keyboard  # Keep this if you want to use keyboard input for stopping
 
 warnings.filterwarnings("ignore")
@@ -18,7 +17,7 @@ load_dotenv()
 
 # Global variables
 audio_queue = queue.Queue()  # Initialize the audio queue
-transcripts = []  # To keep track of transcripts
+transcripts = TranscriptStore()  # Utterances with numeric offsets, interned speakers and text
 last_transcribed_text = ""  # Variable to track the last transcribed text
 
 # Azure Speech SDK setup
@@ -59,7 +58,7 @@ def conversation_transcriber_transcribed_cb(evt: speechsdk.SpeechRecognitionEven
 
     if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
         pc_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        transcripts.append((evt.result.text, pc_time, evt.result.speaker_id))
+        transcripts.append_result(evt.result)
         
         if evt.result.text != last_transcribed_text:
             print(f'[{pc_time}] Speaker ID({evt.result.speaker_id}): {evt.result.text}')
@@ -70,55 +69,11 @@ def conversation_transcriber_transcribed_cb(evt: speechsdk.SpeechRecognitionEven
 def conversation_transcriber_session_started_cb(evt: speechsdk.SessionEventArgs):
     print('SessionStarted event')
 
-# Diarization function (remains unchanged)
+# Diarization function
 def diarize_audio_with_pyannote(audio_chunk):
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", use_auth_token=True)
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_audio_file:
-        with wave.open(temp_audio_file.name, 'wb') as wf:
-            wf.setnchannels(1)  # Mono channel
-            wf.setsampwidth(2)  # Sample width (bytes)
-            wf.setframerate(16000)  # Frame rate (Hz)
-            wf.writeframes(audio_chunk)  # Write audio data to temp file
-
-        # Apply the pipeline to the saved audio file to obtain speaker segments
-        diarization = pipeline(temp_audio_file.name)
-
-        # Extract speaker segments and labels
-        speaker_info = []
-        for segment, label in diarization.itertracks(yield_label=True):
-            speaker_info.append({
-                "start": segment.start,
-                "end": segment.end,
-                "speaker": label
-            })
-    
-    return speaker_info
-
-# Format and print output (remains unchanged)
-def format_output(transcripts, speaker_info):
-    output = []
-    for transcript, timestamp, speaker_id in transcripts:
-        for info in speaker_info:
-            if timestamp >= info["start"] and timestamp <= info["end"]:
-                output.append(f"Speaker {info['speaker']:02}: {transcript}")
-    return "\n".join(output)
-
-# Function to summarize transcriptions using OpenAI API (remains unchanged)
-def summarize_transcriptions(transcripts):
-    combined_transcript = "\n".join([f"Speaker {speaker_id}: {text}" for text, _, speaker_id in transcripts])
-    openai.api_key = os.getenv('OPEN_AI_API_KEY')
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",  # Or use another model like "gpt-4" if available
-            messages=[
-                {"role": "user", "content": f"Please summarize the following conversation:\n\n{combined_transcript}"}
-            ]
-        )
-        summary = response['choices'][0]['message']['content']
-        return summary
-    except Exception as e:
-        print(f"Error during summarization: {e}")
-        return None
+    # Diarize the chunk in memory, no temporary WAV file is written
+    return diarize_waveform(audio_chunk, "pyannote/speaker-diarization-3.1")
+
 
 # Main function to run transcription and diarization
 def main():
@@ -168,7 +123,7 @@ def main():
 
     # Process transcripts
     print(transcripts)
-    summary = summarize_transcriptions(transcripts)
+    summary = summarize_transcriptions(transcripts, api_key=os.getenv('OPEN_AI_API_KEY'))
     if summary:
         print("\nSummary of the conversation:")
         print(summary)
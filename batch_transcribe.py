@@ -0,0 +1,170 @@
+"""Transcribes and diarizes many recordings in parallel, one JSON result file per recording.
+
+Usage:
+    python batch_transcribe.py calls/ "archive/2024-*.wav" --workers 4 --output-dir transcripts
+"""
+import argparse
+import glob
+import json
+import multiprocessing
+import os
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import torch
+import whisper
+from pyannote.audio import Audio
+
+from pipeline_registry import DEFAULT_MODEL_ID, get_pipeline
+from wav_source import open_audio
+from whisper_batch import transcribe_segments
+
+warnings.filterwarnings("ignore")
+
+SAMPLE_RATE = 16000
+STREAMED_EXTENSIONS = (".wav", ".flac", ".ogg", ".opus")  # Read through wav_source, block by block
+DECODED_EXTENSIONS = (".mp3", ".m4a")                       # Decoded whole by pyannote (ffmpeg)
+AUDIO_EXTENSIONS = STREAMED_EXTENSIONS + DECODED_EXTENSIONS
+
+# Models of the current worker process, loaded once by _load_worker_models
+_worker = {}
+
+
+def _load_worker_models(whisper_model, diarization_model, batch_size, threads):
+    # Split the cores between the workers instead of letting each one use all of them
+    torch.set_num_threads(threads)
+    _worker["whisper"] = whisper.load_model(whisper_model)
+    _worker["diarization"] = get_pipeline(diarization_model)
+    _worker["audio"] = Audio(sample_rate=SAMPLE_RATE, mono=True)
+    _worker["batch_size"] = batch_size
+
+
+def _diarize(waveform):
+    diarization = _worker["diarization"](waveform)
+    return [(segment.start, segment.end, speaker) for segment, _, speaker in diarization.itertracks(yield_label=True)]
+
+
+def _process_file(audio_file, output_file):
+    start_time = time.perf_counter()
+    try:
+        if audio_file.lower().endswith(DECODED_EXTENSIONS):
+            # No block decoder for these: decode once and share the samples, as before wav_source
+            waveform, sample_rate = _worker["audio"](audio_file)
+            segments = _diarize({"waveform": waveform, "sample_rate": sample_rate})
+            results = transcribe_segments(_worker["whisper"], waveform.squeeze(0).numpy(), segments,
+                                          batch_size=_worker["batch_size"], sample_rate=sample_rate)
+            duration = waveform.shape[-1] / sample_rate
+        else:
+            # WAV is memory-mapped, FLAC and Opus are decoded in blocks, both resampled to 16 kHz on the fly
+            with open_audio(audio_file) as source:
+                segments = _diarize(source.waveform(sample_rate=SAMPLE_RATE))
+                results = transcribe_segments(_worker["whisper"], source, segments,
+                                              batch_size=_worker["batch_size"], sample_rate=SAMPLE_RATE)
+                duration = source.duration
+    except Exception as e:
+        return audio_file, 0.0, time.perf_counter() - start_time, f"{type(e).__name__}: {e}"
+
+    elapsed = time.perf_counter() - start_time
+    with open(output_file, "w") as f:
+        json.dump({
+            "file": audio_file,
+            "duration": duration,
+            "processing_time": elapsed,
+            "segments": [{"start": start, "end": end, "speaker": speaker, "text": text.strip()}
+                         for start, end, speaker, text in results],
+        }, f, indent=2)
+    return audio_file, duration, elapsed, None
+
+
+def find_audio_files(inputs):
+    """Expands directories and glob patterns into a sorted list of audio files."""
+    files = set()
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            for root, _, names in os.walk(pattern):
+                files.update(os.path.join(root, name) for name in names
+                             if name.lower().endswith(AUDIO_EXTENSIONS))
+        else:
+            files.update(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+    return sorted(files)
+
+
+def output_paths(audio_files, output_dir):
+    """Maps each audio file to a JSON file in output_dir, keeping names unique."""
+    paths = {}
+    used = set()
+    for audio_file in audio_files:
+        stem = os.path.splitext(os.path.basename(audio_file))[0]
+        name, n = stem, 1
+        while name in used:
+            name = f"{stem}_{n}"
+            n += 1
+        used.add(name)
+        paths[audio_file] = os.path.join(output_dir, name + ".json")
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("inputs", nargs="+", help="Directories or glob patterns of recordings")
+    parser.add_argument("--output-dir", default="transcripts", help="Where the JSON results are written")
+    parser.add_argument("--workers", type=int, default=2, help="Worker processes, each loads its own models")
+    parser.add_argument("--whisper-model", default="medium.en")
+    parser.add_argument("--diarization-model", default=DEFAULT_MODEL_ID)
+    parser.add_argument("--batch-size", type=int, default=16, help="Segments per batched Whisper pass")
+    parser.add_argument("--overwrite", action="store_true", help="Reprocess files that already have a result")
+    args = parser.parse_args()
+
+    audio_files = find_audio_files(args.inputs)
+    os.makedirs(args.output_dir, exist_ok=True)
+    outputs = output_paths(audio_files, args.output_dir)
+    if not args.overwrite:
+        # Lets an interrupted overnight run pick up where it stopped
+        audio_files = [path for path in audio_files if not os.path.exists(outputs[path])]
+    if not audio_files:
+        print("No recordings to process.")
+        return
+
+    # Largest files first so one long call does not finish alone at the end
+    audio_files.sort(key=os.path.getsize, reverse=True)
+
+    workers = max(1, min(args.workers, len(audio_files)))
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    print(f"Processing {len(audio_files)} recordings with {workers} workers...")
+
+    total_audio = 0.0
+    total_processing = 0.0
+    failed = 0
+    start_time = time.perf_counter()
+    # spawn: workers start clean instead of inheriting the parent's torch threads
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_load_worker_models,
+        initargs=(args.whisper_model, args.diarization_model, args.batch_size, threads),
+    ) as executor:
+        futures = [executor.submit(_process_file, path, outputs[path]) for path in audio_files]
+        for done, future in enumerate(as_completed(futures), 1):
+            audio_file, duration, elapsed, error = future.result()
+            if error:
+                failed += 1
+                print(f"[{done}/{len(futures)}] {audio_file} failed: {error}")
+                continue
+            total_audio += duration
+            total_processing += elapsed
+            print(f"[{done}/{len(futures)}] {audio_file}: {duration:.0f}s of audio in {elapsed:.1f}s")
+
+    wall_time = time.perf_counter() - start_time
+    processed = len(audio_files) - failed
+    print(f"\nProcessed {processed} recordings ({failed} failed), {total_audio / 3600:.2f} h of audio "
+          f"in {wall_time / 60:.1f} min")
+    if total_audio:
+        # Wall-clock RTF includes model loading and counts the workers together
+        print(f"Real-time factor: {wall_time / total_audio:.3f} overall, "
+              f"{total_processing / total_audio:.3f} per worker")
+    print(f"Throughput: {processed / wall_time * 3600:.0f} files/hour")
+
+
+if __name__ == "__main__":
+    main()
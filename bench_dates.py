@@ -0,0 +1,84 @@
+"""Compares find_dates with the find_dates_in_text it replaces, per utterance.
+
+Usage:
+    python bench_dates.py --utterances 2000
+"""
+import argparse
+import random
+import re
+import time
+
+import dateparser
+
+from date_extraction import find_dates, parse_date
+
+
+def find_dates_in_text(text):
+    """The old extractor from hug.py: the regex is rebuilt per call and every match goes through dateparser."""
+    date_regex = r'\b(?:\d{1,2}(?:st|nd|rd|th)? [A-Za-z]+ \d{4}|\d{1,2} [A-Za-z]+ \d{4}|[A-Za-z]+ \d{1,2},? \d{4}|first? of [A-Za-z]+ in the year of \d{4}|\b\d{2}/\d{2}/\d{4}\b)'
+    matches = re.findall(date_regex, text)
+    found_dates = []
+
+    for match in matches:
+        match = re.sub(r'(\d{1,2})(st|nd|rd|th)', r'\1', match)  # Remove ordinal suffix
+        match = match.replace("in the year of", "").strip()  # Clean format
+        parsed_date = dateparser.parse(match)
+        if parsed_date:
+            found_dates.append(parsed_date)
+
+    return found_dates
+
+
+def make_utterances(count, date_ratio):
+    """Meeting-like sentences, some of which mention a date in one of the supported formats."""
+    rng = random.Random(0)
+    months = ["January", "February", "March", "April", "May", "June", "July", "August",
+              "September", "October", "November", "December"]
+    formats = [
+        lambda d, m, y: f"{d}{'th' if d > 3 else ['st', 'nd', 'rd'][d - 1]} {months[m - 1]} {y}",
+        lambda d, m, y: f"{months[m - 1]} {d}, {y}",
+        lambda d, m, y: f"{d:02d}/{m:02d}/{y}",
+        lambda d, m, y: f"first of {months[m - 1]} in the year of {y}",
+    ]
+    words = "we should move the review to next week and send the agenda to everyone before the call".split()
+    utterances = []
+    for _ in range(count):
+        sentence = " ".join(rng.choice(words) for _ in range(rng.randint(5, 25)))
+        if rng.random() < date_ratio:
+            date = rng.choice(formats)(rng.randint(1, 28), rng.randint(1, 12), rng.randint(2020, 2026))
+            sentence += f" on {date}"
+        utterances.append(sentence + ".")
+    return utterances
+
+
+def run(extract, utterances):
+    """Returns (seconds per utterance, dates found)."""
+    found = 0
+    start_time = time.perf_counter()
+    for utterance in utterances:
+        found += len(extract(utterance))
+    return (time.perf_counter() - start_time) / len(utterances), found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=2000)
+    parser.add_argument("--date-ratio", type=float, default=0.2, help="Share of utterances that mention a date")
+    args = parser.parse_args()
+
+    utterances = make_utterances(args.utterances, args.date_ratio)
+    dateparser.parse("21 May 2003")  # Loads dateparser's language data before timing
+
+    old_time, old_found = run(find_dates_in_text, utterances)
+    new_time, new_found = run(find_dates, utterances)       # Every date string is new to the cache
+    warm_time, _ = run(find_dates, utterances)              # Repeated dates are served from the cache
+
+    print(f"{args.utterances:,} utterances, {args.date_ratio:.0%} with a date")
+    print(f"{'find_dates_in_text':<24}{old_time * 1e6:>10.1f}us per utterance, {old_found} dates")
+    print(f"{'find_dates':<24}{new_time * 1e6:>10.1f}us per utterance, {new_found} dates")
+    print(f"{'find_dates, cached':<24}{warm_time * 1e6:>10.1f}us per utterance")
+    print(f"speedup: {old_time / new_time:.0f}x, cache: {parse_date.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
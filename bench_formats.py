@@ -0,0 +1,91 @@
+"""Compares WAV, FLAC and Opus recordings: bytes on disk, encode time and decode throughput.
+
+Usage:
+    python bench_formats.py out.wav --output-dir /tmp/bench_formats
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+from recorder import AudioRecorder
+from resampler import resample
+from wav_source import open_audio
+
+SAMPLE_RATE = 16000  # What the ASR and diarization loaders decode to
+OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+def encode(samples, sample_rate, path, block=1024):
+    """Writes int16 samples through the recorder, like a live capture would, and returns the seconds taken."""
+    start_time = time.perf_counter()
+    with AudioRecorder(path, sample_rate=sample_rate) as recorder:
+        for first in range(0, len(samples), block):
+            recorder.write(samples[first:first + block].tobytes())
+    return time.perf_counter() - start_time
+
+
+def decode(path, block_seconds, segments, rng):
+    """Times a full streaming decode to 16 kHz and a series of random segment reads."""
+    with open_audio(path) as source:
+        start_time = time.perf_counter()
+        for _ in source.blocks(block_seconds, sample_rate=SAMPLE_RATE):
+            pass
+        full = time.perf_counter() - start_time
+
+        # Like transcribe_segments: short ranges anywhere in the file
+        starts = rng.uniform(0, max(0.0, source.duration - 10.0), segments)
+        start_time = time.perf_counter()
+        for start in starts:
+            source.read(start, start + 10.0, sample_rate=SAMPLE_RATE)
+        seeks = time.perf_counter() - start_time
+        return source.duration, full, seeks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("input", nargs="?", default="out.wav", help="Recording to convert and decode")
+    parser.add_argument("--output-dir", default="bench_formats")
+    parser.add_argument("--block-seconds", type=float, default=10.0, help="Block size of the streaming decode")
+    parser.add_argument("--segments", type=int, default=50, help="Random 10 s reads per format")
+    args = parser.parse_args()
+
+    with open_audio(args.input) as source:
+        sample_rate = source.sample_rate
+        samples = source.read()
+    samples = (np.clip(samples, -1.0, 1.0 - 1 / 32768) * 32768).astype(np.int16)
+
+    # Opus only runs at a few rates, the others are resampled to what the models use anyway
+    opus_rate = sample_rate
+    opus_samples = samples
+    if sample_rate not in OPUS_RATES:
+        opus_rate = SAMPLE_RATE
+        opus_samples = (np.clip(resample(samples / 32768.0, sample_rate, SAMPLE_RATE), -1.0, 1.0 - 1 / 32768)
+                        * 32768).astype(np.int16)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    base = os.path.splitext(os.path.basename(args.input))[0]
+    formats = [
+        ("WAV", os.path.join(args.output_dir, base + ".wav"), samples, sample_rate),
+        ("FLAC", os.path.join(args.output_dir, base + ".flac"), samples, sample_rate),
+        (f"Opus {opus_rate // 1000} kHz", os.path.join(args.output_dir, base + ".opus"), opus_samples, opus_rate),
+    ]
+
+    rng = np.random.default_rng(0)
+    wav_bytes = None
+    print(f"{'format':<14}{'bytes':>14}{'vs WAV':>9}{'encode':>10}{'decode':>12}{'10 s reads':>13}")
+    for name, path, data, rate in formats:
+        encode_time = encode(data, rate, path)
+        size = os.path.getsize(path)
+        wav_bytes = wav_bytes or size
+        duration, full, seeks = decode(path, args.block_seconds, args.segments, rng)
+        print(f"{name:<14}{size:>14,}{size / wav_bytes:>8.1%}{encode_time:>9.2f}s"
+              f"{duration / full:>11.0f}x{seeks / args.segments * 1000:>10.1f} ms")
+
+    print(f"\n{duration:.0f}s of audio; decode is to {SAMPLE_RATE} Hz mono float32, "
+          f"in multiples of real time")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Fills a TranscriptArchive with synthetic sessions and times writes and searches.
+
+Usage:
+    python bench_transcript_archive.py --utterances 1000000 --db /tmp/bench_transcripts.db
+"""
+import argparse
+import os
+import random
+import time
+from itertools import accumulate
+
+from transcript_archive import TranscriptArchive
+
+
+def make_utterances(count, speakers=4, vocabulary=20000):
+    """Synthetic utterances whose word frequencies fall off like speech (Zipf), so rare words are rare."""
+    rng = random.Random(0)
+    words = [f"w{rank}" for rank in range(vocabulary)]
+    cum_weights = list(accumulate(1.0 / (rank + 1) for rank in range(vocabulary)))
+    utterances = []
+    start = 0.0
+    for _ in range(count):
+        duration = rng.uniform(0.5, 8.0)
+        text = " ".join(rng.choices(words, cum_weights=cum_weights, k=rng.randint(3, 20)))
+        utterances.append((text, start, start + duration, f"Guest-{rng.randint(1, speakers)}"))
+        start += duration + rng.uniform(0.0, 1.0)
+    return utterances
+
+
+# A common, a less common and a rare word, a phrase and a boolean query
+QUERIES = ["w60", "w700", "w8000", '"w300 w301"', "w500 NOT w600"]
+
+
+def fill(archive, utterances, sessions):
+    """Archives the utterances split over sessions, returning the seconds add() and the commits took."""
+    per_session = -(-len(utterances) // sessions)
+    add_time = 0.0
+    start_time = time.perf_counter()
+    for first in range(0, len(utterances), per_session):
+        session_id = archive.start_session(f"session {first // per_session + 1}")
+        offset = utterances[first][1]
+        add_start = time.perf_counter()
+        for text, start, end, speaker in utterances[first:first + per_session]:
+            archive.add(session_id, text, start - offset, end - offset, speaker)
+        add_time += time.perf_counter() - add_start
+    archive.flush()
+    return add_time, time.perf_counter() - start_time
+
+
+def time_query(query, repeat):
+    start_time = time.perf_counter()
+    for _ in range(repeat):
+        result = query()
+    return (time.perf_counter() - start_time) / repeat, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=1000000)
+    parser.add_argument("--sessions", type=int, default=500)
+    parser.add_argument("--db", default="bench_transcripts.db")
+    parser.add_argument("--repeat", type=int, default=20, help="Runs per query")
+    args = parser.parse_args()
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(args.db + suffix):
+            os.remove(args.db + suffix)
+
+    utterances = make_utterances(args.utterances)
+    with TranscriptArchive(args.db) as archive:
+        add_time, total_time = fill(archive, utterances, args.sessions)
+        print(f"{args.utterances:,} utterances in {args.sessions} sessions")
+        print(f"add(): {add_time / args.utterances * 1e6:.2f}us per utterance (the live pipeline's cost)")
+        print(f"committed at {args.utterances / total_time:,.0f} utterances/s, "
+              f"{os.path.getsize(args.db) / args.utterances:.0f} B per utterance on disk\n")
+
+        session_id = random.Random(0).randint(1, args.sessions)
+        for query in QUERIES:
+            seconds, count = time_query(lambda: archive.search(query, fts=True), args.repeat)
+            print(f"search {query:<22}{seconds * 1000:>8.2f} ms  ({count} rows)")
+            seconds, count = time_query(
+                lambda: archive.search(query, fts=True, speaker="Guest-2", session_id=session_id), args.repeat)
+            print(f"  one speaker, one session{seconds * 1000:>8.2f} ms  ({count} rows)")
+        seconds, count = time_query(lambda: archive.utterances(session_id, 600, 900), args.repeat)
+        print(f"5 min of one session          {seconds * 1000:>8.2f} ms  ({count} rows)")
+
+
+if __name__ == "__main__":
+    main()
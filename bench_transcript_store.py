@@ -0,0 +1,116 @@
+"""Compares TranscriptStore with the list of (text, pc_time, speaker_id) tuples it replaces.
+
+Usage:
+    python bench_transcript_store.py --utterances 200000
+"""
+import argparse
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from transcript_store import TranscriptStore
+
+
+def make_utterances(count, speakers=4):
+    rng = random.Random(0)
+    words = "the a meeting we should follow up on budget next week agenda item deadline review".split()
+    utterances = []
+    start = 0.0
+    for _ in range(count):
+        duration = rng.uniform(0.5, 8.0)
+        text = " ".join(rng.choice(words) for _ in range(rng.randint(3, 20)))
+        utterances.append((text, start, start + duration, f"Guest-{rng.randint(1, speakers)}"))
+        start += duration + rng.uniform(0.0, 1.0)
+    return utterances
+
+
+def fill_list(utterances, session_start):
+    transcripts = []
+    for text, start, end, speaker_id in utterances:
+        # What the scripts stored: the PC time as a formatted string
+        pc_time = (session_start + timedelta(seconds=start)).strftime('%Y-%m-%d %H:%M:%S')
+        transcripts.append((text, pc_time, speaker_id))
+    return transcripts
+
+
+def fill_store(utterances):
+    transcripts = TranscriptStore()
+    for text, start, end, speaker_id in utterances:
+        transcripts.append(text, start, end, speaker_id)
+    return transcripts
+
+
+def measure(fill, *args):
+    """Returns (result, seconds, bytes allocated) of one fill."""
+    tracemalloc.start()
+    start_time = time.perf_counter()
+    result = fill(*args)
+    elapsed = time.perf_counter() - start_time
+    allocated = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, elapsed, allocated
+
+
+def measure_time(fill, *args):
+    start_time = time.perf_counter()
+    fill(*args)
+    return time.perf_counter() - start_time
+
+
+def time_copy(transcripts):
+    start_time = time.perf_counter()
+    list(transcripts)
+    return time.perf_counter() - start_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--utterances", type=int, default=100000)
+    parser.add_argument("--queries", type=int, default=1000, help="Time-range queries per structure")
+    args = parser.parse_args()
+
+    # The texts exist before either fill, so only the containers and timestamps are measured
+    utterances = make_utterances(args.utterances)
+    session_start = datetime(2024, 1, 1, 9, 0, 0)
+    count = len(utterances)
+
+    transcripts, list_time, list_bytes = measure(fill_list, utterances, session_start)
+    store, store_time, store_bytes = measure(fill_store, utterances)
+    # Timing without tracemalloc, which slows allocation-heavy code down unevenly
+    list_time = min(list_time, measure_time(fill_list, utterances, session_start))
+    store_time = min(store_time, measure_time(fill_store, utterances))
+
+    print(f"{count:,} utterances")
+    print(f"{'':<22}{'list of tuples':>16}{'TranscriptStore':>18}")
+    print(f"{'bytes per utterance':<22}{list_bytes / count:>16.1f}{store_bytes / count:>18.1f}")
+    print(f"{'appends per second':<22}{count / list_time:>16,.0f}{count / store_time:>18,.0f}")
+
+    # One minute windows anywhere in the session
+    rng = random.Random(1)
+    session_length = utterances[-1][2]
+    windows = [rng.uniform(0, session_length - 60) for _ in range(args.queries)]
+
+    start_time = time.perf_counter()
+    for window_start in windows:
+        low = (session_start + timedelta(seconds=window_start)).strftime('%Y-%m-%d %H:%M:%S')
+        high = (session_start + timedelta(seconds=window_start + 60)).strftime('%Y-%m-%d %H:%M:%S')
+        # The strings only compare correctly because of the fixed format; each query scans the list
+        [row for row in transcripts if low <= row[1] < high]
+    list_query = (time.perf_counter() - start_time) / args.queries
+
+    start_time = time.perf_counter()
+    for window_start in windows:
+        list(store.between(window_start, window_start + 60))
+    store_query = (time.perf_counter() - start_time) / args.queries
+    print(f"{'1 min range query':<22}{list_query * 1e6:>14.1f}us{store_query * 1e6:>16.1f}us")
+
+    start_time = time.perf_counter()
+    for _ in range(100):
+        store.snapshot()
+    print(f"\nsnapshot: {(time.perf_counter() - start_time) / 100 * 1e6:.2f}us, "
+          f"list copy: {time_copy(transcripts) * 1e6:.0f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+import numpy as np
+import pyaudio
+
+from resampler import StreamingResampler
+
+SAMPLE_RATE = 16000  # What Whisper, pyannote and wav2vec2 all expect
+
+
+class MicrophoneCapture:
+    """Microphone input at the device's native rate, delivered as 16 kHz mono.
+
+    PyAudio is opened at the rate the device reports as its default, so
+    the driver never has to convert (or refuse) 16 kHz. Each buffer is
+    mixed down and passed through one StreamingResampler, whose filter
+    state carries over between reads.
+
+    read() returns int16 PCM bytes like PyAudio's stream.read(), so it can
+    replace a 16 kHz stream as is; read_float() returns float32 samples.
+
+    Usage:
+        capture = MicrophoneCapture()
+        data = capture.read(1024)        # 1024 frames at 16 kHz
+        capture.close()
+    """
+
+    def __init__(self, sample_rate=SAMPLE_RATE, device_index=None, channels=1, frames_per_buffer=1024):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.frames_per_buffer = frames_per_buffer
+
+        self._pyaudio = pyaudio.PyAudio()
+        if device_index is None:
+            device = self._pyaudio.get_default_input_device_info()
+        else:
+            device = self._pyaudio.get_device_info_by_index(device_index)
+        self.native_rate = int(device["defaultSampleRate"])
+        self.device_name = device["name"]
+
+        self._stream = self._pyaudio.open(format=pyaudio.paInt16, channels=channels, rate=self.native_rate,
+                                          input=True, input_device_index=device_index,
+                                          frames_per_buffer=frames_per_buffer)
+        self._resampler = StreamingResampler(self.native_rate, sample_rate)
+        self._pending = np.zeros(0, dtype=np.float32)   # Resampled samples not yet returned
+        self.frames_read = 0                            # Output frames returned, the capture clock
+
+    @property
+    def time(self):
+        """Seconds of audio returned so far."""
+        return self.frames_read / self.sample_rate
+
+    def read_float(self, frames):
+        """Returns the next `frames` samples as 16 kHz mono float32, blocking until they are captured."""
+        parts = [self._pending]
+        available = len(self._pending)
+        while available < frames:
+            data = self._stream.read(self.frames_per_buffer, exception_on_overflow=False)
+            samples = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+            samples *= 1.0 / 32768.0
+            if self.channels > 1:
+                samples = samples.reshape(-1, self.channels).mean(axis=1)
+            samples = self._resampler.process(samples)
+            parts.append(samples)
+            available += len(samples)
+
+        samples = np.concatenate(parts) if len(parts) > 1 else self._pending
+        self._pending = samples[frames:]
+        self.frames_read += frames
+        return samples[:frames]
+
+    def read(self, frames):
+        """Returns the next `frames` samples as 16 kHz mono int16 PCM bytes."""
+        samples = self.read_float(frames)
+        return (np.clip(samples, -1.0, 1.0 - 1 / 32768) * 32768).astype(np.int16).tobytes()
+
+    def close(self):
+        if self._stream is not None:
+            if self._stream.is_active():
+                self._stream.stop_stream()
+            self._stream.close()
+            self._stream = None
+            self._pyaudio.terminate()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,9 +1,16 @@
 from pyannote.audio import Pipeline
 import torch
 import numpy as np
-import librosa
-import soundfile as sf
 from transformers import pipeline as hf_pipeline
+from wav_source import open_audio
+from alignment import assign_words, group_utterances, turns_from_annotation
+
+# wav2vec2 runs on overlapping windows instead of the whole file at once: attention memory grows
+# with the square of the input length. The stride on each side is decoded but then discarded,
+# so words at window edges keep their context
+CHUNK_LENGTH_S = 20
+STRIDE_LENGTH_S = 4
+BATCH_SIZE = 8  # Windows sent through the model together
 
 # Load the pretrained diarization pipeline
 diarization_pipeline = Pipeline.from_pretrained(
@@ -14,44 +21,35 @@ diarization_pipeline = Pipeline.from_pretrained(
 # Send the pipeline to GPU (when available)
 diarization_pipeline.to(torch.device("cpu"))
 
-# Load the audio file
+# Memory-map the audio file, both models read it at 16 kHz from the same source
 audio_file = "out.wav"
+source = open_audio(audio_file)
 
 # Apply the pretrained pipeline
-diarization = diarization_pipeline(audio_file)
+diarization = diarization_pipeline(source.waveform(sample_rate=16000))
 
 # Step 1: Transcribe the audio
 # Use Hugging Face's ASR model (you can also use your preferred speech-to-text model)
 asr_model = hf_pipeline("automatic-speech-recognition", model="facebook/wav2vec2-base-960h")
 
-# Load audio file and preprocess it for the ASR model
-audio_data, sample_rate = librosa.load(audio_file, sr=16000)
-
-# Step 2: Perform speech recognition
-# The model expects a file, so save the audio data as a temporary file
-temp_audio_file = "out.wav"
-sf.write(temp_audio_file, audio_data, sample_rate)
-
-# Transcribe the audio
-transcription_result = asr_model(temp_audio_file)
-transcribed_text = transcription_result['text']
-
-# Split the transcribed text into segments
-# Here we will assume that the transcription is a single sentence. 
-# In practice, you would need to split it into segments as you see fit.
-transcribed_segments = transcribed_text.split('. ')  # You may change this based on your needs
-
-# Step 3: Print the result with speaker labels and spoken text
-for turn, _, speaker in diarization.itertracks(yield_label=True):
-    start_time = turn.start
-    end_time = turn.end
-
-    # Find the corresponding transcribed text segment
-    # Here we assume a simple mapping where each segment is spoken during the diarization period
-    for segment in transcribed_segments:
-        # This is a naive approach; you might want to implement a better matching logic based on time
-        print(f"start={start_time:.1f}s stop={end_time:.1f}s speaker_{speaker}: {segment}")
-
-# Clean up the temporary audio file
-import os
-os.remove(temp_audio_file)
+# Resample in streaming blocks for the ASR model
+audio_data = source.read(sample_rate=16000)
+
+# Step 2: Perform speech recognition on the samples directly, no temporary file.
+# The CTC frame offsets give each word a start and end time
+transcription_result = asr_model(
+    {"raw": audio_data, "sampling_rate": 16000},
+    chunk_length_s=CHUNK_LENGTH_S,
+    stride_length_s=STRIDE_LENGTH_S,
+    batch_size=BATCH_SIZE,
+    return_timestamps="word",
+)
+words = [{"word": " " + chunk["text"], "start": chunk["timestamp"][0], "end": chunk["timestamp"][1]}
+         for chunk in transcription_result["chunks"]]
+
+# Step 3: Give each word to the speaker turn it overlaps, then print runs of the same speaker
+speaker_info = turns_from_annotation(diarization)
+for start_time, end_time, speaker, text in group_utterances(assign_words(words, speaker_info)):
+    print(f"start={start_time:.1f}s stop={end_time:.1f}s speaker_{speaker or 'Unknown'}: {text}")
+
+source.close()
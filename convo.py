@@ -2,10 +2,12 @@ import os
 import time
 import threading
 import azure.cognitiveservices.speech as speechsdk
-import pyaudio
-import tempfile
+from capture import MicrophoneCapture
 import queue
-from pyannote.audio import Pipeline
+from alignment import format_output
+from transcript_store import TranscriptStore
+from diarization import diarize_waveform
+from session_runner import SessionRunner
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
@@ -13,7 +15,8 @@ load_dotenv()
 
 # Global variables
 audio_queue = queue.Queue()
-transcripts = []  # To keep track of transcripts
+session = SessionRunner()  # Stop event shared by the capture and diarization threads
+transcripts = TranscriptStore()  # Utterances with numeric offsets, interned speakers and text
 
 # Azure Speech SDK setup
 def setup_speech_config():
@@ -39,7 +42,7 @@ def conversation_transcriber_session_stopped_cb(evt: speechsdk.SessionEventArgs)
 def conversation_transcriber_transcribed_cb(evt: speechsdk.SpeechRecognitionEventArgs):
     if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
         # Store the recognized text and its offset
-        transcripts.append((evt.result.text, evt.result.offset, evt.result.speaker_id))  # Save transcript, timestamp, and speaker ID
+        transcripts.append_result(evt.result)  # Save transcript, offsets and speaker ID
     elif evt.result.reason == speechsdk.ResultReason.NoMatch:
         pass  # No action needed
 
@@ -53,54 +56,23 @@ def conversation_transcriber_session_started_cb(evt: speechsdk.SessionEventArgs)
 
 # Real-time audio capture
 def capture_audio_to_queue():
-    p = pyaudio.PyAudio()
-    stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=1024)
+    # Opened at the device's native rate and resampled to 16 kHz
+    stream = MicrophoneCapture()
 
     print("Capturing audio... Press Ctrl + C to stop.")
 
     try:
-        while True:
+        while not session.stopped:
             audio_data = stream.read(1024)
             audio_queue.put(audio_data)  # Enqueue audio data for diarization
-    except KeyboardInterrupt:
-        stream.stop_stream()
+    finally:
         stream.close()
-        p.terminate()
         print("Audio capture ended.")
 
 # Diarization function
 def diarize_audio_with_pyannote(audio_chunk):
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.0",use_auth_token=True)
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_audio_file:
-        with wave.open(temp_audio_file.name, 'wb') as wf:
-            wf.setnchannels(1)  # Mono channel
-            wf.setsampwidth(2)  # Sample width (bytes)
-            wf.setframerate(16000)  # Frame rate (Hz)
-            wf.writeframes(audio_chunk)  # Write audio data to temp file
-
-        # Apply the pipeline to the saved audio file to obtain speaker segments
-        diarization = pipeline(temp_audio_file.name)
-
-        # Extract speaker segments and labels
-        speaker_info = []
-        for segment, track, label in diarization.itertracks(yield_label=True):
-            speaker_info.append({
-                "start": segment.start,
-                "end": segment.end,
-                "speaker": label
-            })
-    
-    return speaker_info
-
-# Format and print output
-def format_output(transcripts, speaker_info):
-    output = []
-    for transcript, timestamp, speaker_id in transcripts:
-        # Match the transcript with the speaker based on timing
-        for info in speaker_info:
-            if timestamp >= info["start"] and timestamp <= info["end"]:
-                output.append(f"Speaker {info['speaker']:02}: {transcript}")
-    return "\n".join(output)
+    # Diarize the chunk in memory, no temporary WAV file is written
+    return diarize_waveform(audio_chunk, "pyannote/speaker-diarization-3.0")
 
 # Main function to run transcription and diarization
 def main():
@@ -111,13 +83,10 @@ def main():
     audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
     conversation_transcriber = speechsdk.transcription.ConversationTranscriber(speech_config=speech_config, audio_config=audio_config)
 
-    transcribing_stop = False
-
     # Define stop callback
     def stop_cb(evt: speechsdk.SessionEventArgs):
         print('CLOSING on {}'.format(evt))
-        nonlocal transcribing_stop
-        transcribing_stop = True
+        session.stop()
 
     # Connect callbacks to the events fired by the conversation transcriber
     conversation_transcriber.transcribed.connect(conversation_transcriber_transcribed_cb)
@@ -137,17 +106,23 @@ def main():
     audio_capture_thread = threading.Thread(target=capture_audio_to_queue)
     audio_capture_thread.start()
 
-    # Continuously process audio chunks from the queue
-    while not transcribing_stop:
-        if not audio_queue.empty():
-            audio_chunk = audio_queue.get()
-            speaker_info = diarize_audio_with_pyannote(audio_chunk)  # Process the audio chunk for diarization
-            # Combine results and print
-            final_output = format_output(transcripts, speaker_info)
-            if final_output:  # Print only if there's output
-                print(final_output)  # Print combined results
+    # Diarize each audio chunk and print the combined results
+    def process_audio(audio_chunk):
+        speaker_info = diarize_audio_with_pyannote(audio_chunk)  # Process the audio chunk for diarization
+        if not speaker_info:
+            return
+        # Combine results and print; only utterances starting inside the turns can get a speaker
+        final_output = format_output(transcripts.between(min(turn["start"] for turn in speaker_info),
+                                                         max(turn["end"] for turn in speaker_info)),
+                                     speaker_info)
+        if final_output:  # Print only if there's output
+            print(final_output)  # Print combined results
+
+    # Block on the queue until the session stops (SDK event or Ctrl + C)
+    session.run_queue(audio_queue, process_audio)
 
     conversation_transcriber.stop_transcribing_async()
+    audio_capture_thread.join()
 
 # Main execution
 if __name__ == "__main__":
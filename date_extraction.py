@@ -0,0 +1,78 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+
+MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "jun": 6, "jul": 7, "aug": 8,
+    "sep": 9, "sept": 9, "oct": 10, "nov": 11, "dec": 12,
+}
+
+# Month names Azure's other locales produce; these strings are left to dateparser
+OTHER_MONTHS = (
+    "januar", "februar", "märz", "mai", "juni", "juli", "oktober", "dezember",                       # German
+    "janvier", "février", "mars", "avril", "juin", "juillet", "août", "septembre", "octobre",        # French
+    "novembre", "décembre",
+    "enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto", "septiembre",         # Spanish
+    "octubre", "noviembre", "diciembre",
+)
+
+# Only known month names: "Room 12, 2024" or "3 apples 2020" must not match, let alone reach dateparser
+_MONTH = "(?i:" + "|".join(sorted(set(MONTHS) | set(OTHER_MONTHS), key=len, reverse=True)) + ")"
+
+# The formats find_dates_in_text matched, compiled once. Each alternative names its own groups
+DATE_PATTERN = re.compile(r"""\b(?:
+    (?P<dmy_day>\d{1,2})(?:st|nd|rd|th)?\ (?P<dmy_month>MONTH)\ (?P<dmy_year>\d{4})           # 21st May 2003
+  | (?P<mdy_month>MONTH)\ (?P<mdy_day>\d{1,2}),?\ (?P<mdy_year>\d{4})                        # May 21, 2003
+  | first?\ of\ (?P<first_month>MONTH)\ in\ the\ year\ of\ (?P<first_year>\d{4})            # first of May in the year of 2003
+  | (?P<num_day>\d{2})/(?P<num_month>\d{2})/(?P<num_year>\d{4})                             # 21/05/2003
+)\b""".replace("MONTH", _MONTH), re.VERBOSE)
+
+_ORDINAL = re.compile(r"(\d{1,2})(st|nd|rd|th)")
+
+
+def _fallback(text):
+    """Parses the dates with month names in other languages, which the fast path does not know."""
+    import dateparser  # Slow to import, and only needed for OTHER_MONTHS
+
+    return dateparser.parse(_ORDINAL.sub(r"\1", text).replace("in the year of", "").strip())
+
+
+@lru_cache(maxsize=4096)
+def parse_date(text):
+    """Returns the datetime for a string DATE_PATTERN matched, or None if it is not a valid date."""
+    match = DATE_PATTERN.fullmatch(text)
+    if match is None:
+        return _fallback(text)
+
+    groups = match.groupdict()
+    if groups["num_day"]:
+        day, month, year = int(groups["num_day"]), int(groups["num_month"]), groups["num_year"]
+    else:
+        prefix = next(name for name in ("dmy", "mdy", "first") if groups[name + "_month"])
+        month = MONTHS.get(groups[prefix + "_month"].lower())
+        if month is None:
+            return _fallback(text)
+        day = 1 if prefix == "first" else int(groups[prefix + "_day"])
+        year = groups[prefix + "_year"]
+
+    try:
+        return datetime(int(year), month, day)
+    except ValueError:  # 31 February, 00/13/2003
+        return None
+
+
+def find_dates(text):
+    """Returns the datetimes of the dates mentioned in one utterance, in order.
+
+    Usage:
+        find_dates("Let's meet on 21st May 2003 or May 28, 2003")
+        # [datetime(2003, 5, 21, 0, 0), datetime(2003, 5, 28, 0, 0)]
+    """
+    found_dates = []
+    for match in DATE_PATTERN.finditer(text):
+        parsed_date = parse_date(match.group())
+        if parsed_date:
+            found_dates.append(parsed_date)
+    return found_dates
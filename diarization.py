@@ -0,0 +1,37 @@
+import numpy as np
+import torch
+
+from alignment import turns_from_annotation
+from pipeline_registry import DEFAULT_MODEL_ID, get_pipeline
+
+SAMPLE_RATE = 16000  # Sample rate of the PCM captured by the live scripts
+
+
+def pcm_to_waveform(audio_chunk, sample_rate=SAMPLE_RATE):
+    """Wraps int16 PCM bytes (or a NumPy array) in the in-memory input dict pyannote accepts.
+
+    Args:
+        audio_chunk (bytes | np.ndarray): Mono 16-bit PCM bytes, or int16/float32 samples.
+        sample_rate (int): Sample rate of the audio.
+    """
+    if isinstance(audio_chunk, (bytes, bytearray, memoryview)):
+        # View the raw buffer as int16 samples without copying it
+        audio_chunk = np.frombuffer(audio_chunk, dtype=np.int16)
+
+    if audio_chunk.dtype == np.int16:
+        # The only copy on this path: scale int16 to float32 in [-1, 1)
+        samples = audio_chunk.astype(np.float32)
+        samples *= 1.0 / 32768.0
+    else:
+        samples = np.asarray(audio_chunk, dtype=np.float32)
+
+    # torch.from_numpy shares memory with the array, pyannote expects (channel, time)
+    waveform = torch.from_numpy(samples.reshape(1, -1))
+    return {"waveform": waveform, "sample_rate": sample_rate}
+
+
+def diarize_waveform(audio_chunk, model_id=DEFAULT_MODEL_ID, sample_rate=SAMPLE_RATE):
+    """Runs speaker diarization on an in-memory audio chunk and returns the speaker turns."""
+    pipeline = get_pipeline(model_id)
+    diarization = pipeline(pcm_to_waveform(audio_chunk, sample_rate))
+    return turns_from_annotation(diarization)
@@ -2,6 +2,7 @@
 
 import whisper
 from pyannote.audio import Pipeline
+from alignment import assign_speakers, assign_words, group_utterances, turns_from_annotation
 import warnings
 warnings.filterwarnings("ignore")
 
@@ -11,6 +12,9 @@ pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.0", use_auth
 # Load the Whisper model
 model = whisper.load_model("tiny.en")
 
+# Attribute individual words instead of whole ASR segments to speakers
+WORD_TIMESTAMPS = True
+
 # Function for transcription and diarization
 def transcribe_and_diarize(audio_file):
     # Perform speaker diarization
@@ -20,29 +24,32 @@ def transcribe_and_diarize(audio_file):
 
     # Transcribe the audio file using Whisper
     print("Transcribing audio...")
-    asr_result = model.transcribe(audio_file)
+    asr_result = model.transcribe(audio_file, word_timestamps=WORD_TIMESTAMPS)
     print("Transcription complete.")
 
     # Check the results
     print(f"Diarization Result: {diarization_result}")
     print(f"ASR Result: {asr_result}")
 
-    # Collect results
-    results = []
-
-    for segment in diarization_result.itersegments():
-        start_time = segment.start
-        end_time = segment.end
-        
-        # Attempt to get the speaker label
-        speaker = segment.label if hasattr(segment, 'label') else "Unknown"
-
-        # Match segments with transcription
-        for asr_segment in asr_result['segments']:
-            if start_time >= asr_segment['start'] and end_time <= asr_segment['end']:
-                transcript = asr_segment['text']
-                results.append((start_time, end_time, speaker, transcript))
-                break  # Break once you find the matching segment
+    speaker_info = turns_from_annotation(diarization_result)
+    asr_segments = asr_result['segments']
+
+    if WORD_TIMESTAMPS:
+        # Give every word to the turn it overlaps, then join runs of the same speaker
+        words = [word for asr_segment in asr_segments for word in asr_segment.get('words', [])]
+        results = [(start, end, speaker or "Unknown", transcript)
+                   for start, end, speaker, transcript in group_utterances(assign_words(words, speaker_info))]
+    else:
+        # Label each ASR segment with the speaker it overlaps the most
+        speakers = assign_speakers(
+            [(asr_segment['start'], asr_segment['end']) for asr_segment in asr_segments],
+            speaker_info
+        )
+
+        # Collect results
+        results = []
+        for asr_segment, speaker in zip(asr_segments, speakers):
+            results.append((asr_segment['start'], asr_segment['end'], speaker or "Unknown", asr_segment['text']))
 
     # Print results
     if results:
@@ -1,14 +1,18 @@
 import os
 import queue
+import asyncio
 import azure.cognitiveservices.speech as speechsdk
 from datetime import datetime
-import openai
 from pyannote.audio import Pipeline
+from orchestrator import SessionOrchestrator, StageResult, Transcribed
+from transcript_store import TranscriptStore
+from summarizer import summarize_transcriptions
+from transcript_archive import TranscriptArchive
+from date_extraction import find_dates
+from action_items import ActionItemScanner
 from dotenv import load_dotenv
 import warnings
 import wave
-import re
-import dateparser
 
 # Suppress warnings
 warnings.filterwarnings("ignore")
@@ -18,12 +22,17 @@ load_dotenv()
 
 # Global variables
 audio_queue = queue.Queue()  
-transcripts = []  
+transcripts = TranscriptStore()  # Utterances with numeric offsets, interned speakers and text
+# Utterances are archived here for later search, None to not archive them
+ARCHIVE_FILE = "transcripts.db"
 
 class ConversationTranscriber:
-    def __init__(self):
+    def __init__(self, stage_concurrency=1):
         self.speech_config = self.setup_speech_config()
         self.last_transcribed_text = ""
+        self.stage_concurrency = stage_concurrency  # Utterances each post-processing stage handles at once
+        self.dates_found = []
+        self.action_items_found = []
 
     def setup_speech_config(self):
         speech_key = os.getenv('AZURE_SPEECH_API_KEY')
@@ -37,29 +46,58 @@ class ConversationTranscriber:
         speech_config.set_property(property_id=speechsdk.PropertyId.SpeechServiceResponse_DiarizeIntermediateResults, value='true')
         return speech_config
 
-    def conversation_transcriber_transcribed_cb(self, evt: speechsdk.SpeechRecognitionEventArgs):
-        if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-            pc_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-            transcripts.append((evt.result.text, pc_time, evt.result.speaker_id))
+    def handle_transcribed(self, event):
+        pc_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        transcripts.append(event.text, event.start, event.end, event.speaker_id)
 
-            if evt.result.text != self.last_transcribed_text:
-                print(f'[{pc_time}] Speaker ID({evt.result.speaker_id}): {evt.result.text}')
-                self.last_transcribed_text = evt.result.text
+        if event.text != self.last_transcribed_text:
+            print(f'[{pc_time}] Speaker ID({event.speaker_id}): {event.text}')
+            self.last_transcribed_text = event.text
+
+    async def run_session(self, conversation_transcriber):
+        # SDK events reach this loop through the orchestrator, the post-processing runs in its executors
+        orchestrator = SessionOrchestrator()
+        orchestrator.add_stage("dates", find_dates, self.stage_concurrency)
+        orchestrator.add_stage("action_items", ActionItemScanner().scan_utterance, self.stage_concurrency,
+                               with_event=True)
+        orchestrator.attach(conversation_transcriber)
+        orchestrator.start()
+
+        # Start transcription
+        conversation_transcriber.start_transcribing_async()
+        print("Recording... Press Enter to stop.")
+        orchestrator.stop_on_enter()
+
+        async for event in orchestrator.events():
+            if isinstance(event, Transcribed):
+                self.handle_transcribed(event)
+            elif isinstance(event, StageResult):
+                if event.stage == "dates":
+                    self.dates_found += event.result
+                else:
+                    for item in event.result:
+                        print(f"Action item ({item.speaker_id}): {item.text}")
+                    self.action_items_found += event.result
 
     def start_transcribing(self):
         audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
         conversation_transcriber = speechsdk.transcription.ConversationTranscriber(speech_config=self.speech_config, audio_config=audio_config)
 
         # Connect callbacks to events
-        conversation_transcriber.transcribed.connect(self.conversation_transcriber_transcribed_cb)
         conversation_transcriber.session_stopped.connect(lambda evt: print('Session stopped.'))
         conversation_transcriber.canceled.connect(lambda evt: print('Transcription canceled.'))
 
-        # Start transcription
-        conversation_transcriber.start_transcribing_async()
-        print("Recording... Press Enter to stop.")
-        input("Press Enter to stop...")
-        conversation_transcriber.stop_transcribing_async().get()  # Wait for stop to complete
+        # Every utterance appended to the transcripts is also queued for the archive
+        archive = TranscriptArchive(ARCHIVE_FILE) if ARCHIVE_FILE else None
+        if archive:
+            archive.record(transcripts, name="hug")
+        try:
+            asyncio.run(self.run_session(conversation_transcriber))
+            # Enter stops the transcription inside the session; this covers a session the SDK ended itself
+            conversation_transcriber.stop_transcribing_async().get()  # Wait for stop to complete
+        finally:
+            if archive:
+                archive.close()
 
 def format_output(transcripts):
     output = []
@@ -67,64 +105,22 @@ def format_output(transcripts):
         output.append(f"Speaker {speaker_id}: {transcript}")
     return "\n".join(output)
 
-def summarize_transcriptions(transcripts):
-    combined_transcript = "\n".join([f"Speaker {speaker_id}: {text}" for text, _, speaker_id in transcripts])
-    
-    # Explicitly inform the model if it's a monologue or dialogue
-    if len(set([speaker_id for _, _, speaker_id in transcripts])) == 1:
-
-        combined_transcript = "This is a monologue. Here is the transcript:\n" + combined_transcript
-    else:
-       
-        combined_transcript = "This is a conversation. Here is the transcript:\n" + combined_transcript
-
-    openai.api_key = os.getenv('AI_API_KEY')
-    try:
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini", 
-            messages=[
-                {"role": "user", "content": f"Please summarize the following conversation:\n\n{combined_transcript}"}
-            ]
-        )
-        summary = response['choices'][0]['message']['content']
-        return summary
-    except Exception as e:
-        print(f"Error during summarization: {e}")
-        return None
-
-def find_dates_in_text(text):
-    date_regex = r'\b(?:\d{1,2}(?:st|nd|rd|th)? [A-Za-z]+ \d{4}|\d{1,2} [A-Za-z]+ \d{4}|[A-Za-z]+ \d{1,2},? \d{4}|first? of [A-Za-z]+ in the year of \d{4}|\b\d{2}/\d{2}/\d{4}\b)'
-    matches = re.findall(date_regex, text)
-    found_dates = []
-
-    for match in matches:
-        match = re.sub(r'(\d{1,2})(st|nd|rd|th)', r'\1', match)  # Remove ordinal suffix
-        match = match.replace("in the year of", "").strip()  # Clean format
-        parsed_date = dateparser.parse(match)
-        if parsed_date:
-            found_dates.append(parsed_date)
-    
-    return found_dates
-
-def find_action_items(text):
-    action_item_regex = r'\b(?:do|follow|submit|review|check|ensure|make sure to|you must|please)\b.*?[.!?]'
-    return re.findall(action_item_regex, text, re.IGNORECASE)
 
 def main():
     try:
         transcriber = ConversationTranscriber()
         transcriber.start_transcribing()
 
-        full_transcript_text = " ".join([t[0] for t in transcripts])  # Combine all transcribed text
-        dates_found = find_dates_in_text(full_transcript_text)
-        
-        if dates_found:
+        # Dates and action items were extracted live, utterance by utterance
+        if transcriber.dates_found:
             print("\nDates found in conversation:")
-            for date in dates_found:
+            for date in transcriber.dates_found:
                 print(date.strftime("%Y-%m-%d"))
 
-        action_items_found = find_action_items(full_transcript_text)
-        print("Action items found:", action_items_found)
+        if transcriber.action_items_found:
+            print("\nAction items found:")
+            for item in transcriber.action_items_found:
+                print(f"[{item.start:.1f}s] Speaker {item.speaker_id}: {item.text}")
 
         summary = summarize_transcriptions(transcripts)
         if summary:
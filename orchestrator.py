@@ -0,0 +1,194 @@
+import asyncio
+import threading
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+import azure.cognitiveservices.speech as speechsdk
+
+from transcript_store import TICKS_PER_SECOND
+
+# Events produced by a session
+Transcribed = namedtuple("Transcribed", "text start end speaker_id")
+SpeakerTurns = namedtuple("SpeakerTurns", "turns")
+StageResult = namedtuple("StageResult", "stage source result")
+SessionStopped = namedtuple("SessionStopped", "reason")
+
+
+class SessionOrchestrator:
+    """Runs a live session on one asyncio loop and exposes it as a stream of events.
+
+    SDK callbacks only hand their event over to the loop with
+    call_soon_threadsafe, so they never block the SDK thread. CPU-heavy work
+    (diarization, post-processing) runs in per-stage thread pools whose size
+    sets how many calls of that stage may run at once.
+
+    Usage (inside a coroutine):
+        orchestrator = SessionOrchestrator()
+        orchestrator.add_stage("dates", find_dates)
+        orchestrator.attach(conversation_transcriber)
+        orchestrator.start()
+        conversation_transcriber.start_transcribing_async()
+        async for event in orchestrator.events():
+            ...
+    """
+
+    def __init__(self):
+        self._loop = None
+        self._queue = None
+        self._stages = []
+        self._audio_sources = []
+        self._executors = []
+        self._stage_runners = []
+        self._stage_tasks = set()
+        self._tasks = set()
+        self._stopped = False
+        self._transcriber = None
+
+    def add_stage(self, name, func, concurrency=1, with_event=False):
+        """Runs func(text) in an executor for every transcribed utterance.
+
+        With with_event, func gets the whole Transcribed event instead, for
+        stages that need the speaker or the timing.
+        """
+        self._stages.append((name, func, concurrency, with_event))
+
+    def add_audio_source(self, audio_buffer, diarizer, min_samples=1024):
+        """Diarizes audio from an AudioRingBuffer as it arrives and emits SpeakerTurns."""
+        self._audio_sources.append((audio_buffer, diarizer, min_samples))
+
+    def attach(self, conversation_transcriber):
+        """Connects the transcriber's SDK signals to the session."""
+        self._transcriber = conversation_transcriber
+        conversation_transcriber.transcribed.connect(self._on_transcribed)
+        conversation_transcriber.session_stopped.connect(lambda evt: self.stop("session stopped"))
+        conversation_transcriber.canceled.connect(lambda evt: self.stop("canceled"))
+
+    def start(self):
+        """Binds the session to the running loop; call it before starting the SDK."""
+        if self._loop is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+
+        for name, func, concurrency, with_event in self._stages:
+            executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix=name)
+            self._executors.append(executor)
+            self._stage_runners.append(self._make_stage(name, func, executor, with_event))
+
+        for audio_buffer, diarizer, min_samples in self._audio_sources:
+            # Waiting for audio and diarizing it get their own threads so neither blocks the loop
+            reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio")
+            worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="diarization")
+            self._executors += [reader, worker]
+            self._spawn(self._diarize(audio_buffer, diarizer, min_samples, reader, worker), self._tasks)
+
+    def stop(self, reason="stopped"):
+        """Ends the session. Safe to call from any thread."""
+        self._post(SessionStopped(reason))
+
+    def stop_on_enter(self, prompt="Press Enter to stop..."):
+        """Ends the session when Enter is pressed.
+
+        With an attached transcriber, Enter stops the transcriber and the
+        session ends on its session_stopped signal, after the last phrase.
+        """
+        def wait_for_enter():
+            try:
+                input(prompt)
+            except EOFError:
+                return
+            if self._transcriber is None:
+                self.stop("enter pressed")
+                return
+            # The SDK delivers the phrase in progress while stopping, then signals session_stopped
+            try:
+                self._transcriber.stop_transcribing_async().get()
+            except Exception as e:
+                self.stop(f"stop failed: {e}")
+
+        # A daemon thread, so a session stopped by the SDK does not wait for Enter to exit
+        threading.Thread(target=wait_for_enter, daemon=True).start()
+
+    async def events(self):
+        """Yields the session events until it stops; SessionStopped is always the last one."""
+        self.start()
+        try:
+            while True:
+                event = await self._queue.get()
+                if isinstance(event, SessionStopped):
+                    break
+                self._run_stages(event)
+                yield event
+
+            # Drain what arrived with the stop, running stages for late utterances too,
+            # until every stage has finished and its result has been yielded
+            self._stopped = True
+            while self._stage_tasks or not self._queue.empty():
+                if self._queue.empty():
+                    await asyncio.wait(set(self._stage_tasks))
+                    continue
+                pending = self._queue.get_nowait()
+                if not isinstance(pending, SessionStopped):
+                    self._run_stages(pending)
+                    yield pending
+            yield event
+        finally:
+            self._stopped = True
+            for task in list(self._tasks | self._stage_tasks):
+                task.cancel()
+            for executor in self._executors:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run_stages(self, event):
+        if isinstance(event, Transcribed):
+            for run_stage in self._stage_runners:
+                self._spawn(run_stage(event), self._stage_tasks)
+
+    def _make_stage(self, name, func, executor, with_event):
+        async def run_stage(event):
+            try:
+                result = await self._loop.run_in_executor(executor, func, event if with_event else event.text)
+            except Exception as e:
+                print(f"Error in {name} stage: {e}")
+                return
+            self._queue.put_nowait(StageResult(name, event, result))
+        return run_stage
+
+    async def _diarize(self, audio_buffer, diarizer, min_samples, reader, worker):
+        def feed(views):
+            turns = []
+            for view in views:
+                turns += diarizer.feed(view)
+            audio_buffer.consume(sum(len(view) for view in views))
+            return turns
+
+        while not self._stopped:
+            views = await self._loop.run_in_executor(reader, audio_buffer.peek, None, min_samples, 0.5)
+            if not views:
+                if audio_buffer.closed:
+                    break
+                continue
+            turns = await self._loop.run_in_executor(worker, feed, views)
+            if turns:
+                self._queue.put_nowait(SpeakerTurns(turns))
+
+    def _on_transcribed(self, evt: speechsdk.SpeechRecognitionEventArgs):
+        # Runs on the SDK thread: copy the fields out and return immediately
+        if evt.result.reason != speechsdk.ResultReason.RecognizedSpeech:
+            return
+        start = evt.result.offset / TICKS_PER_SECOND
+        end = start + evt.result.duration / TICKS_PER_SECOND
+        self._post(Transcribed(evt.result.text, start, end, evt.result.speaker_id))
+
+    def _post(self, event):
+        if self._loop is None:
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._queue.put_nowait, event)
+        except RuntimeError:
+            pass  # The loop already closed, the session is over
+
+    def _spawn(self, coroutine, tasks):
+        task = self._loop.create_task(coroutine)
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
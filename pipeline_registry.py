@@ -0,0 +1,59 @@
+import threading
+from collections import OrderedDict
+
+from pyannote.audio import Pipeline
+
+# Default diarization model used by the live scripts
+DEFAULT_MODEL_ID = "pyannote/speaker-diarization-3.1"
+
+# Maximum number of pipelines kept in memory at the same time
+MAX_PIPELINES = 2
+
+# Loaded pipelines keyed by model id, least recently used first
+_pipelines = OrderedDict()
+_pipelines_lock = threading.Lock()
+# One lock per model id so two threads never load the same model twice
+_loading_locks = {}
+
+
+def get_pipeline(model_id=DEFAULT_MODEL_ID, use_auth_token=True):
+    """Returns the diarization pipeline for model_id, loading it only once per process."""
+    with _pipelines_lock:
+        if model_id in _pipelines:
+            _pipelines.move_to_end(model_id)
+            return _pipelines[model_id]
+        loading_lock = _loading_locks.setdefault(model_id, threading.Lock())
+
+    # Load outside the registry lock so other models stay available while this one loads
+    with loading_lock:
+        with _pipelines_lock:
+            if model_id in _pipelines:
+                _pipelines.move_to_end(model_id)
+                return _pipelines[model_id]
+
+        pipeline = Pipeline.from_pretrained(model_id, use_auth_token=use_auth_token)
+
+        with _pipelines_lock:
+            _pipelines[model_id] = pipeline
+            # Evict the least recently used pipelines when too many variants are configured
+            while len(_pipelines) > MAX_PIPELINES:
+                _pipelines.popitem(last=False)
+            return pipeline
+
+
+def set_max_pipelines(max_pipelines):
+    """Changes how many pipelines are cached, evicting the oldest ones if needed."""
+    global MAX_PIPELINES
+    if max_pipelines < 1:
+        raise ValueError("max_pipelines must be at least 1")
+
+    with _pipelines_lock:
+        MAX_PIPELINES = max_pipelines
+        while len(_pipelines) > MAX_PIPELINES:
+            _pipelines.popitem(last=False)
+
+
+def clear_pipelines():
+    """Drops every cached pipeline."""
+    with _pipelines_lock:
+        _pipelines.clear()
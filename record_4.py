@@ -1,30 +1,51 @@
+import time
 import whisper
-from pyannote.audio import Pipeline, Audio
+from pyannote.audio import Pipeline
+from wav_source import open_audio
+from whisper_batch import transcribe_segments
 import warnings
 "using whisper with labelled speakers"
 # Ignore all warnings
 warnings.filterwarnings("ignore")
 
+# Segments transcribed together, set to 1 for the original one-segment-at-a-time loop
+BATCH_SIZE = 16
+
 # Load the speaker diarization pipeline
 pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.0", use_auth_token=True)
 
 # Load the Whisper model
 model = whisper.load_model("medium.en")
 
-# Load audio file and perform diarization
+# Memory-map the audio file once, both passes read (and resample) only what they need from it
 audio_file = "out.wav"
-diarization_result = pipeline(audio_file)
-
-# Initialize Audio for cropping segments
-audio = Audio(sample_rate=16000, mono=True)
-
-# Iterate through diarization results and transcribe each segment
-for segment, _, speaker in diarization_result.itertracks(yield_label=True):
-    # Crop the audio segment
-    waveform, sample_rate = audio.crop(audio_file, segment)
-    
-    # Transcribe the cropped audio segment using Whisper
-    text = model.transcribe(waveform.squeeze().numpy())["text"]
-    
-    # Print the results
-    print(f"{segment.start:.2f}s {segment.end:.2f}s {speaker}: {text}")
+source = open_audio(audio_file)
+diarization_result = pipeline(source.waveform(sample_rate=16000))
+
+segments = [(segment.start, segment.end, speaker)
+            for segment, _, speaker in diarization_result.itertracks(yield_label=True)]
+
+start_time = time.perf_counter()
+
+if BATCH_SIZE > 1:
+    # Transcribe the segments in length-bucketed batches
+    results = transcribe_segments(model, source, segments, batch_size=BATCH_SIZE, sample_rate=16000)
+else:
+    # Iterate through diarization results and transcribe each segment
+    results = []
+    for segment, _, speaker in diarization_result.itertracks(yield_label=True):
+        # Read the audio segment from the mapped file
+        samples = source.read(segment.start, segment.end, sample_rate=16000)
+
+        # Transcribe the cropped audio segment using Whisper
+        text = model.transcribe(samples)["text"]
+        results.append((segment.start, segment.end, speaker, text))
+
+elapsed = time.perf_counter() - start_time
+
+# Print the results
+for start, end, speaker, text in results:
+    print(f"{start:.2f}s {end:.2f}s {speaker}: {text}")
+
+print(f"Transcribed {len(results)} segments in {elapsed:.1f}s "
+      f"({len(results) / elapsed:.2f} segments/sec, batch size {BATCH_SIZE})")
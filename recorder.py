@@ -0,0 +1,216 @@
+import os
+import queue
+import threading
+import time
+import wave
+
+import numpy as np
+
+# Tells the writer thread to finish the current file and exit
+_CLOSE = object()
+
+# soundfile (format, subtype) by file extension, for compressed recordings
+_COMPRESSED_FORMATS = {
+    ".flac": ("FLAC", "PCM_16"),
+    ".opus": ("OGG", "OPUS"),
+    ".ogg": ("OGG", "OPUS"),
+}
+# The only rates the Opus codec runs at
+_OPUS_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class _WavWriter:
+    """Appends PCM to a WAV file through a large write buffer."""
+
+    def __init__(self, path, sample_rate, channels, sample_width, buffer_size):
+        self._raw_file = open(path, "wb", buffering=buffer_size)
+        self._wav_file = wave.open(self._raw_file, "wb")
+        self._wav_file.setnchannels(channels)
+        self._wav_file.setsampwidth(sample_width)
+        self._wav_file.setframerate(sample_rate)
+
+    def write(self, data):
+        self._wav_file.writeframesraw(data)
+
+    def checkpoint(self):
+        # writeframes patches the header when the data length has changed
+        self._wav_file.writeframes(b"")
+
+    def close(self):
+        # wave patches the header and flushes, but leaves closing a file object it was given to us
+        self._wav_file.close()
+        self._raw_file.close()
+
+
+class _CompressedWriter:
+    """Encodes 16-bit PCM to FLAC or Opus with libsndfile as it is written."""
+
+    def __init__(self, path, sample_rate, channels, format, subtype):
+        import soundfile as sf  # Only needed for compressed recordings
+
+        self.channels = channels
+        self._file = sf.SoundFile(path, "w", samplerate=sample_rate, channels=channels,
+                                  format=format, subtype=subtype)
+
+    def write(self, data):
+        self._file.write(np.frombuffer(data, dtype=np.int16).reshape(-1, self.channels))
+
+    def checkpoint(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class AudioRecorder:
+    """Writes PCM to WAV, FLAC or Opus files on a background thread as the audio arrives.
+
+    write() only queues the buffer; a writer thread appends it to the file
+    through a buffered file object, encoding it first for .flac and
+    .opus/.ogg filenames. The queue is bounded, so memory stays constant
+    however long the recording runs. The file header is rewritten every
+    `header_interval` seconds of audio and on close, so a crash loses at
+    most the last few seconds.
+
+    With `segment_minutes`, the recording rolls over to a new file every
+    N minutes, named after the base filename and the segment start time,
+    e.g. out_20240501-093000.wav.
+
+    With `source`, a BufferCursor over a shared capture buffer, the writer
+    thread reads the audio straight from that buffer instead of write().
+
+    Usage:
+        recorder = AudioRecorder("out.flac", sample_rate=44100)
+        recorder.write(data)
+        ...
+        recorder.close()
+    """
+
+    def __init__(self, filename, sample_rate=16000, channels=1, sample_width=2, segment_minutes=None,
+                 max_queue=256, buffer_size=1 << 20, header_interval=10.0, source=None):
+        self.filename = filename
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.sample_width = sample_width
+        self.buffer_size = buffer_size
+        self.frame_bytes = channels * sample_width
+
+        self._format = _COMPRESSED_FORMATS.get(os.path.splitext(filename)[1].lower())
+        if self._format and sample_width != 2:
+            raise ValueError("Compressed recordings are encoded from 16-bit PCM")
+        if self._format and self._format[1] == "OPUS" and sample_rate not in _OPUS_RATES:
+            raise ValueError(f"Opus cannot encode {sample_rate} Hz audio, record at one of {_OPUS_RATES}")
+
+        self._segment_bytes = None
+        if segment_minutes:
+            self._segment_bytes = int(segment_minutes * 60 * sample_rate) * self.frame_bytes
+        self._header_bytes = int(header_interval * sample_rate) * self.frame_bytes
+
+        self.files = []          # Paths written so far, in order
+        self.frames_written = 0
+        self._source = source
+        self._stopping = False
+        self._error = None
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def duration(self):
+        """Seconds of audio written to disk so far."""
+        return self.frames_written / self.sample_rate
+
+    def write(self, data):
+        """Queues PCM bytes for writing; blocks only if the disk falls far behind."""
+        data = bytes(data)
+        while True:
+            if self._error is not None:
+                raise self._error
+            try:
+                self._queue.put(data, timeout=0.5)
+                return
+            except queue.Full:
+                pass  # Check again that the writer has not failed before waiting more
+
+    def close(self):
+        """Writes what is queued, patches the header of the last file and stops the writer."""
+        if self._thread.is_alive() and self._error is None:
+            self._stopping = True
+            if self._source is None:
+                self._queue.put(_CLOSE)
+            self._thread.join()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        writer = None
+        file_bytes = 0        # Data bytes in the current file
+        unpatched = 0         # Data bytes written since the header was last patched
+        try:
+            for data in self._buffers():
+                while data:
+                    if writer is None:
+                        writer = self._open_next()
+                        file_bytes = unpatched = 0
+
+                    # Split the buffer at the segment boundary
+                    count = len(data)
+                    if self._segment_bytes:
+                        count = min(count, self._segment_bytes - file_bytes)
+                    writer.write(data[:count])
+                    data = data[count:]
+                    file_bytes += count
+                    unpatched += count
+                    self.frames_written += count // self.frame_bytes
+
+                    if self._segment_bytes and file_bytes >= self._segment_bytes:
+                        writer.close()
+                        writer = None
+                    elif unpatched >= self._header_bytes:
+                        writer.checkpoint()
+                        unpatched = 0
+        except Exception as e:
+            self._error = e
+        finally:
+            if writer is not None:
+                writer.close()
+
+    def _buffers(self):
+        if self._source is None:
+            while True:
+                data = self._queue.get()
+                if data is _CLOSE:
+                    return
+                yield data
+
+        while True:
+            stopping = self._stopping
+            views = self._source.peek(timeout=0 if stopping else 0.5)
+            for view in views:
+                # The int16 samples as bytes, still without a copy
+                yield memoryview(view).cast("B")
+            self._source.consume(sum(len(view) for view in views))
+            if stopping or (not views and self._source.closed):
+                return
+
+    def _open_next(self):
+        path = self.filename
+        if self._segment_bytes:
+            base, ext = os.path.splitext(self.filename)
+            path = f"{base}_{time.strftime('%Y%m%d-%H%M%S')}{ext or '.wav'}"
+            if path in self.files:
+                path = f"{base}_{time.strftime('%Y%m%d-%H%M%S')}_{len(self.files)}{ext or '.wav'}"
+
+        if self._format:
+            writer = _CompressedWriter(path, self.sample_rate, self.channels, *self._format)
+        else:
+            # Large buffered writes instead of one system call per microphone buffer
+            writer = _WavWriter(path, self.sample_rate, self.channels, self.sample_width, self.buffer_size)
+        self.files.append(path)
+        return writer
@@ -0,0 +1,99 @@
+from math import gcd
+
+import numpy as np
+
+# Outputs computed per vectorized step, bounds the temporary (outputs, taps) array
+_STEP = 16384
+
+
+class StreamingResampler:
+    """Polyphase FIR resampler for audio that arrives in blocks.
+
+    The rate ratio is reduced to up / down integers, and only the filter
+    phases that produce output samples are evaluated. The input samples the
+    next block still needs are carried over, so resampling a stream block by
+    block gives the same samples as resampling it in one piece. The filter
+    delay is compensated: output sample n is at time n / target_rate.
+
+    Usage:
+        resampler = StreamingResampler(44100, 16000)
+        for block in blocks:
+            out = resampler.process(block)
+        out = resampler.flush()
+    """
+
+    def __init__(self, orig_rate, target_rate, taps_per_phase=32, rolloff=0.94, beta=8.6):
+        divisor = gcd(int(orig_rate), int(target_rate))
+        self.orig_rate = orig_rate
+        self.target_rate = target_rate
+        self.up = int(target_rate) // divisor
+        self.down = int(orig_rate) // divisor
+        self.taps = taps_per_phase
+
+        # Windowed-sinc low-pass at the lower of the two Nyquist rates, designed at the upsampled rate
+        # An odd length keeps the delay a whole number of samples, the zero tap pads it to taps * up
+        length = self.taps * self.up - 1
+        cutoff = rolloff / max(self.up, self.down)
+        t = np.arange(length) - (length - 1) / 2
+        h = cutoff * np.sinc(cutoff * t) * np.kaiser(length, beta) * self.up
+        h = np.append(h, 0.0)
+        # phases[p, k] is tap p + k * up, the taps applied to input i - k for phase p
+        self._phases = h.reshape(self.taps, self.up).T.astype(np.float32)
+        self._delay = (length - 1) // 2
+
+        self.reset()
+
+    def reset(self):
+        """Starts a new stream."""
+        self._history = np.zeros(self.taps - 1, dtype=np.float32)
+        self._in_count = 0    # Input samples received
+        self._out_count = 0   # Output samples produced
+
+    @property
+    def passthrough(self):
+        return self.up == self.down
+
+    def output_length(self, input_length):
+        """Number of output samples for input_length input samples."""
+        return -(-input_length * self.up // self.down)
+
+    def process(self, block):
+        """Resamples the next block of float32 samples and returns the samples it completes."""
+        block = np.asarray(block, dtype=np.float32)
+        if self.passthrough:
+            self._in_count += len(block)
+            self._out_count += len(block)
+            return block
+
+        samples = np.concatenate((self._history, block))
+        base = self._in_count - (self.taps - 1)   # Stream index of samples[0]
+        self._in_count += len(block)
+
+        # Output n needs input (n * down + delay) // up, which must have arrived
+        end = max(self._out_count, -(-(self._in_count * self.up - self._delay) // self.down))
+        out = np.empty(end - self._out_count, dtype=np.float32)
+        offsets = np.arange(self.taps)
+        for step in range(self._out_count, end, _STEP):
+            n = np.arange(step, min(step + _STEP, end))
+            position = n * self.down + self._delay
+            index = (position // self.up - base)[:, None] - offsets
+            out[step - self._out_count:step - self._out_count + len(n)] = np.einsum(
+                "ij,ij->i", samples[index], self._phases[position % self.up])
+
+        self._out_count = end
+        self._history = samples[len(samples) - (self.taps - 1):]
+        return out
+
+    def flush(self):
+        """Returns the last output samples, still held back by the filter delay."""
+        remaining = self.output_length(self._in_count) - self._out_count
+        if self.passthrough or remaining <= 0:
+            return np.zeros(0, dtype=np.float32)
+        out = self.process(np.zeros(self._delay // self.up + self.taps, dtype=np.float32))
+        return out[:remaining]
+
+
+def resample(audio, orig_rate, target_rate):
+    """Resamples a whole float32 array."""
+    resampler = StreamingResampler(orig_rate, target_rate)
+    return np.concatenate((resampler.process(audio), resampler.flush()))
@@ -0,0 +1,281 @@
+import threading
+
+import numpy as np
+
+# What write() does when the buffer is full
+OVERFLOW_POLICIES = ("drop_oldest", "block", "downsample")
+
+
+def _views(buffer, position, count):
+    # One view, or two when the samples wrap around the end of the buffer
+    capacity = len(buffer)
+    start = position % capacity
+    first = min(count, capacity - start)
+    if first == count:
+        return (buffer[start:start + count],)
+    return (buffer[start:], buffer[:count - first])
+
+
+class AudioRingBuffer:
+    """Preallocated single-producer/single-consumer ring buffer of int16 PCM.
+
+    The capture thread writes with write(). The consumer looks at the pending
+    audio with peek(), which returns views into the buffer (no copies), and
+    releases it with consume() once processed.
+
+    Positions only ever grow and each one is written by a single thread, so
+    the data path needs no lock; a condition variable is only used to wake up
+    a thread waiting for data or space.
+    """
+
+    def __init__(self, seconds=30, sample_rate=16000, overflow="drop_oldest"):
+        if overflow not in OVERFLOW_POLICIES:
+            raise ValueError(f"overflow must be one of {OVERFLOW_POLICIES}")
+
+        self.sample_rate = sample_rate
+        self.capacity = int(seconds * sample_rate)
+        self.overflow = overflow
+        self._buffer = np.zeros(self.capacity, dtype=np.int16)
+
+        self._write_pos = 0  # Total samples written, only changed by the producer
+        self._read_pos = 0   # Total samples consumed, only changed by the consumer
+        self._condition = threading.Condition()
+        self._closed = False
+
+        # Backpressure accounting
+        self.written_frames = 0
+        self.dropped_frames = 0
+        self.high_water_mark = 0
+
+    @property
+    def available(self):
+        """Number of samples waiting to be consumed."""
+        return min(self._write_pos - self._read_pos, self.capacity)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def write(self, audio_data, timeout=None):
+        """Copies int16 PCM bytes (or samples) into the buffer, applying the overflow policy.
+
+        Returns the number of samples stored; nothing is written once the buffer is closed.
+        """
+        samples = audio_data
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            samples = np.frombuffer(audio_data, dtype=np.int16)
+        received = len(samples)
+        if self._closed:
+            return 0
+
+        free = self.capacity - (self._write_pos - self._read_pos)
+        if received > free:
+            if self.overflow == "block":
+                # A block larger than the buffer only keeps its newest `capacity` samples, so wait for that much
+                needed = min(received, self.capacity)
+                with self._condition:
+                    if not self._condition.wait_for(
+                        lambda: self._closed or self.capacity - (self._write_pos - self._read_pos) >= needed,
+                        timeout
+                    ):
+                        self.dropped_frames += received
+                        return 0
+                if self._closed:
+                    return 0
+            elif self.overflow == "downsample" and free > 0:
+                # Keep every n-th sample so the block fits in the free space
+                step = -(-received // free)
+                samples = samples[::step]
+
+        if len(samples) > self.capacity:
+            samples = samples[-self.capacity:]
+
+        # Copy in at most two slices around the end of the buffer
+        start = self._write_pos % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        self._buffer[:len(samples) - first] = samples[first:]
+
+        # Frames overwritten before the consumer read them, or thrown away by downsampling
+        overrun = max(0, self._write_pos + len(samples) - self._read_pos - self.capacity)
+        self.dropped_frames += overrun + received - len(samples)
+        self._write_pos += len(samples)
+        self.written_frames += received
+        self.high_water_mark = max(self.high_water_mark, self.available)
+
+        with self._condition:
+            self._condition.notify_all()
+        return len(samples)
+
+    def peek(self, max_samples=None, min_samples=1, timeout=None):
+        """Returns views over the pending samples, oldest first.
+
+        Waits until at least min_samples are pending (or the timeout expires,
+        or the buffer is closed). The result holds one view, or two when the
+        data wraps around the end of the buffer. The views stay valid until
+        consume() is called, except under "drop_oldest" when the producer laps
+        the consumer.
+        """
+        if self.available < min_samples and not self._closed:
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed or self.available >= min_samples, timeout)
+
+        # Skip what the producer already overwrote
+        self._read_pos = max(self._read_pos, self._write_pos - self.capacity)
+        count = self._write_pos - self._read_pos
+        if max_samples is not None:
+            count = min(count, max_samples)
+        if count <= 0:
+            return ()
+
+        return _views(self._buffer, self._read_pos, count)
+
+    def consume(self, count):
+        """Releases count samples returned by peek()."""
+        self._read_pos = min(self._read_pos + count, self._write_pos)
+        if self.overflow == "block":
+            with self._condition:
+                self._condition.notify_all()
+
+    def close(self):
+        """Wakes up every waiting thread, e.g. when the capture stops."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def stats(self):
+        return {
+            "written_frames": self.written_frames,
+            "dropped_frames": self.dropped_frames,
+            "high_water_mark": self.high_water_mark,
+            "capacity": self.capacity,
+        }
+
+
+class BroadcastRingBuffer:
+    """Ring buffer of int16 PCM written by one capture thread and read by several consumers.
+
+    Every consumer reads through its own BufferCursor over the same
+    preallocated samples, so one capture can feed e.g. a recognizer, a
+    diarizer and a recorder without a copy per consumer. Positions count
+    samples since the capture started and are the session's shared clock:
+    sample n is at n / sample_rate seconds for every consumer.
+
+    The capture never waits for a consumer. A consumer that falls more
+    than `seconds` behind loses its oldest samples, counted in its stats.
+    """
+
+    def __init__(self, seconds=30, sample_rate=16000):
+        self.sample_rate = sample_rate
+        self.capacity = int(seconds * sample_rate)
+        self._buffer = np.zeros(self.capacity, dtype=np.int16)
+        self._write_pos = 0  # Total samples written, only changed by the producer
+        self._condition = threading.Condition()
+        self._closed = False
+        self.cursors = []
+
+    @property
+    def position(self):
+        """Samples written since the capture started."""
+        return self._write_pos
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def cursor(self, name):
+        """Returns a new consumer cursor, starting at the next sample written."""
+        cursor = BufferCursor(self, name)
+        self.cursors.append(cursor)
+        return cursor
+
+    def write(self, audio_data):
+        """Copies int16 PCM bytes (or samples) into the buffer and wakes up the consumers."""
+        samples = audio_data
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            samples = np.frombuffer(audio_data, dtype=np.int16)
+        if len(samples) > self.capacity:
+            samples = samples[-self.capacity:]
+
+        start = self._write_pos % self.capacity
+        first = min(len(samples), self.capacity - start)
+        self._buffer[start:start + first] = samples[:first]
+        self._buffer[:len(samples) - first] = samples[first:]
+        self._write_pos += len(samples)
+
+        with self._condition:
+            self._condition.notify_all()
+        return len(samples)
+
+    def close(self):
+        """Wakes up every waiting consumer, e.g. when the capture stops."""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+    def stats(self):
+        return {cursor.name: cursor.stats() for cursor in self.cursors}
+
+
+class BufferCursor:
+    """One consumer's read position in a BroadcastRingBuffer.
+
+    Has the consumer side of AudioRingBuffer (peek, consume, available,
+    closed), so SessionRunner.run_buffer() and the recorder accept either.
+    """
+
+    def __init__(self, ring, name):
+        self.ring = ring
+        self.name = name
+        self._read_pos = ring.position  # Only changed by this consumer
+        self.dropped_frames = 0
+        self.high_water_mark = 0
+
+    @property
+    def position(self):
+        """Shared-clock sample index of the next sample this consumer reads."""
+        return self._read_pos
+
+    @property
+    def time(self):
+        """Shared-clock time of the next sample this consumer reads, in seconds."""
+        return self._read_pos / self.ring.sample_rate
+
+    @property
+    def available(self):
+        return min(self.ring.position - self._read_pos, self.ring.capacity)
+
+    @property
+    def closed(self):
+        return self.ring.closed
+
+    def peek(self, max_samples=None, min_samples=1, timeout=None):
+        """Returns views over this consumer's pending samples, oldest first (see AudioRingBuffer.peek)."""
+        ring = self.ring
+        if self.available < min_samples and not ring.closed:
+            with ring._condition:
+                ring._condition.wait_for(lambda: ring.closed or self.available >= min_samples, timeout)
+
+        # Skip what the producer already overwrote
+        written = ring.position
+        if self._read_pos < written - ring.capacity:
+            self.dropped_frames += written - ring.capacity - self._read_pos
+            self._read_pos = written - ring.capacity
+        count = written - self._read_pos
+        self.high_water_mark = max(self.high_water_mark, count)
+        if max_samples is not None:
+            count = min(count, max_samples)
+        if count <= 0:
+            return ()
+        return _views(ring._buffer, self._read_pos, count)
+
+    def consume(self, count):
+        """Releases count samples returned by peek()."""
+        self._read_pos = min(self._read_pos + count, self.ring.position)
+
+    def stats(self):
+        return {
+            "position": self._read_pos,
+            "dropped_frames": self.dropped_frames,
+            "high_water_mark": self.high_water_mark,
+        }
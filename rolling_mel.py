@@ -0,0 +1,92 @@
+import numpy as np
+import torch
+from whisper.audio import HOP_LENGTH, N_FFT, N_FRAMES, N_SAMPLES, SAMPLE_RATE, mel_filters
+
+# log10 of the floor Whisper clamps mel energies to, i.e. what silence (zero padding) maps to
+_SILENCE_LOG = -10.0
+
+
+class RollingLogMel:
+    """Rolling 30 s microphone buffer whose log-mel frames are computed incrementally.
+
+    New PCM is appended to a preallocated float32 array, and only the STFT
+    frames covering the new samples are computed and shifted into a
+    preallocated (n_mels, 3000) array. window() then returns the normalized
+    log-mel input for Whisper's encoder without recomputing the 30 s window.
+    """
+
+    def __init__(self, n_mels=80):
+        self.n_mels = n_mels
+        self._filters = mel_filters("cpu", n_mels).numpy()
+        # Periodic Hann window, the same one torch.stft is given by Whisper
+        self._hann = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+
+        # The last N_FFT / 2 samples of the previous block, needed by the next frames
+        self._pad = N_FFT // 2
+        self.samples = np.zeros(N_SAMPLES + self._pad, dtype=np.float32)
+        self._log_mel = np.full((n_mels, N_FRAMES), _SILENCE_LOG, dtype=np.float32)
+        self.reset()
+
+    def reset(self):
+        """Starts a new empty window."""
+        self.samples[:] = 0.0
+        self._log_mel[:] = _SILENCE_LOG
+        self.total_samples = 0   # Samples received since the last reset
+        self._frames_done = 0    # STFT frames computed since the last reset
+
+    @property
+    def duration(self):
+        """Seconds of audio in the window, at most 30."""
+        return min(self.total_samples, N_SAMPLES) / SAMPLE_RATE
+
+    @property
+    def is_full(self):
+        return self.total_samples >= N_SAMPLES
+
+    def add(self, audio_data):
+        """Appends int16 PCM bytes or samples and computes the log-mel frames they complete."""
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            audio_data = np.frombuffer(audio_data, dtype=np.int16)
+        if audio_data.dtype == np.int16:
+            audio_data = audio_data.astype(np.float32) / 32768.0
+        audio_data = audio_data[-N_SAMPLES:]
+        count = len(audio_data)
+        if count == 0:
+            return
+
+        # Shift the rolling PCM buffer left and copy the new block in
+        self.samples[:-count] = self.samples[count:]
+        self.samples[-count:] = audio_data
+        self.total_samples += count
+
+        # Frame k is centred on sample k * HOP_LENGTH and needs N_FFT / 2 samples after it
+        last_frame = (self.total_samples - self._pad) // HOP_LENGTH
+        new_frames = min(last_frame + 1 - self._frames_done, N_FRAMES)
+        if new_frames <= 0:
+            return
+
+        # Window start of the first new frame, relative to the end of self.samples
+        first_start = (last_frame + 1 - new_frames) * HOP_LENGTH - self._pad - self.total_samples
+        start = len(self.samples) + first_start
+        frames = np.lib.stride_tricks.sliding_window_view(
+            self.samples[start:start + (new_frames - 1) * HOP_LENGTH + N_FFT], N_FFT
+        )[::HOP_LENGTH]
+
+        power = np.abs(np.fft.rfft(frames * self._hann, axis=1)) ** 2
+        log_mel = np.log10(np.maximum(self._filters @ power.T, 1e-10))
+
+        self._log_mel[:, :-new_frames] = self._log_mel[:, new_frames:]
+        self._log_mel[:, -new_frames:] = log_mel
+        self._frames_done = last_frame + 1
+
+    def window(self):
+        """Returns the normalized (n_mels, 3000) log-mel tensor Whisper's encoder expects."""
+        log_mel = self._log_mel
+        if self._frames_done < N_FRAMES:
+            # Like whisper.pad_or_trim: the audio first, then silence up to 30 s
+            log_mel = np.full_like(self._log_mel, _SILENCE_LOG)
+            if self._frames_done:
+                log_mel[:, :self._frames_done] = self._log_mel[:, -self._frames_done:]
+
+        log_mel = np.maximum(log_mel, log_mel.max() - 8.0)
+        return torch.from_numpy((log_mel + 4.0) / 4.0)
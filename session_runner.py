@@ -0,0 +1,69 @@
+import queue
+import threading
+
+
+class SessionRunner:
+    """Blocks the consumer loops of a live session on events instead of spinning.
+
+    A single stop event is shared by every thread of the session. It is set by
+    stop(), which can be connected directly to the SDK session_stopped and
+    canceled signals, by Enter (stop_on_enter) or by Ctrl+C in the main thread.
+    """
+
+    def __init__(self, poll_interval=0.5):
+        # How often blocked loops wake up to check the stop event
+        self.poll_interval = poll_interval
+        self._stop_event = threading.Event()
+
+    @property
+    def stopped(self):
+        return self._stop_event.is_set()
+
+    def stop(self, evt=None):
+        """Ends the session; accepts an optional SDK event so it can be used as a callback."""
+        self._stop_event.set()
+
+    def stop_on_enter(self, prompt="Press Enter to stop..."):
+        """Stops the session when Enter is pressed, without blocking the caller."""
+        def wait_for_enter():
+            try:
+                input(prompt)
+            except EOFError:
+                return
+            self.stop()
+
+        threading.Thread(target=wait_for_enter, daemon=True).start()
+
+    def wait(self, timeout=None):
+        """Sleeps until the session stops. Returns True once it has stopped."""
+        try:
+            return self._stop_event.wait(timeout)
+        except KeyboardInterrupt:
+            self.stop()
+            return True
+
+    def run_queue(self, work_queue, handler):
+        """Calls handler for each item put on work_queue until the session stops."""
+        try:
+            while not self.stopped:
+                try:
+                    item = work_queue.get(timeout=self.poll_interval)
+                except queue.Empty:
+                    continue
+                handler(item)
+        except KeyboardInterrupt:
+            self.stop()
+
+    def run_buffer(self, audio_buffer, handler, min_samples=1):
+        """Calls handler with views over new audio from an AudioRingBuffer until the session stops."""
+        try:
+            while not self.stopped:
+                views = audio_buffer.peek(min_samples=min_samples, timeout=self.poll_interval)
+                if not views:
+                    if audio_buffer.closed:
+                        break
+                    continue
+                handler(views)
+                audio_buffer.consume(sum(len(view) for view in views))
+        except KeyboardInterrupt:
+            self.stop()
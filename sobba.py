@@ -126,16 +126,19 @@ region = os.getenv("AZURE_SPEECH_REGION")    # Replace with the actual environme
 speak_to_microphone(api_key, region)'''
 import os
 import threading
-import queue
 import azure.cognitiveservices.speech as speechsdk
-import wave
-import pyaudio
-import tempfile
-from pyannote.audio import Pipeline
+from capture import MicrophoneCapture
+from alignment import SpeakerLabeller
+from transcript_store import TranscriptStore
+from ring_buffer import AudioRingBuffer
+from session_runner import SessionRunner
+from streaming_diarizer import StreamingDiarizer
 from dotenv import load_dotenv
 
-# Global queue to handle audio chunks for diarization
-audio_queue = queue.Queue()
+# Bounded buffer of captured PCM for diarization
+audio_buffer = AudioRingBuffer(seconds=30)
+transcripts = TranscriptStore()  # Utterances with numeric offsets, interned speakers and text
+session = SessionRunner()  # Stop event shared by the Azure, capture and diarization threads
 
 # Step 1: Real-Time Azure Speech-to-Text Transcription
 def transcribe_audio_with_azure(api_key, region):
@@ -150,8 +153,8 @@ def transcribe_audio_with_azure(api_key, region):
     def recognized(evt):
         if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
             print(f"Recognized: {evt.result.text}")
-            # Enqueue audio chunk for diarization
-            audio_queue.put((evt.result.text, evt.result.offset))  # Store transcript with timestamp
+            # Keep the transcript apart from the audio buffer, which only carries PCM for the diarizer
+            transcripts.append_result(evt.result)  # Store transcript with its offsets
         elif evt.result.reason == speechsdk.ResultReason.NoMatch:
             print("No speech could be recognized.")
         elif evt.result.reason == speechsdk.ResultReason.Canceled:
@@ -162,53 +165,10 @@ def transcribe_audio_with_azure(api_key, region):
     speech_recognizer.start_continuous_recognition_async()
 
     print("Transcription is running. Press Ctrl + C to stop.")
-    try:
-        while True:
-            pass
-    except KeyboardInterrupt:
-        print("Session ended by user.")
-        speech_recognizer.stop_continuous_recognition_async().get()
-
-# Step 2: Real-Time Speaker Diarization
-def diarize_audio_with_pyannote(audio_chunk):
-    # Load pre-trained speaker diarization model
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.0",use_auth_token=True)
-
-    # Create a temporary file to store the audio chunk for diarization
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_audio_file:
-        with wave.open(temp_audio_file.name, 'wb') as wf:
-            wf.setnchannels(1)  # Mono channel
-            wf.setsampwidth(2)  # Sample width (bytes)
-            wf.setframerate(16000)  # Frame rate (Hz)
-
-            # Write the audio chunk (this should be actual audio data in bytes)
-            wf.writeframes(audio_chunk)
-
-        # Apply the pipeline to the saved audio file to obtain speaker segments
-        diarization = pipeline(temp_audio_file.name)
-
-        # Extract speaker segments and labels
-        speaker_info = []
-        for segment, track, label in diarization.itertracks(yield_label=True):
-            speaker_info.append({
-                "start": segment.start,
-                "end": segment.end,
-                "speaker": label
-            })
-    
-    return speaker_info
-
-# Step 3: Format Output
-def format_output(transcripts, speaker_info):
-    output = []
-    for transcript, timestamp in transcripts:
-        # Here we simply match the transcript to a speaker, assuming you have speaker timing info.
-        # This would require actual logic to match speakers to transcripts based on timing.
-        for info in speaker_info:
-            if timestamp >= info["start"] and timestamp <= info["end"]:
-                output.append(f"Speaker {info['speaker']}: {transcript}")
-
-    return "\n".join(output)
+    # Sleep until the session stops instead of spinning
+    session.wait()
+    print("Session ended by user.")
+    speech_recognizer.stop_continuous_recognition_async().get()
 
 # Example Usage: Capture Real-Time Audio Chunks
 def main():
@@ -219,38 +179,53 @@ def main():
     region = os.getenv("AZURE_SPEECH_REGION")    # Replace with actual Azure Speech Region
 
     # Example of how to handle audio capture
-    def capture_audio_to_queue():
-        p = pyaudio.PyAudio()
-        stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=1024)
+    def capture_audio_to_buffer():
+        # Opened at the device's native rate and resampled to 16 kHz
+        stream = MicrophoneCapture()
 
         print("Capturing audio... Press Ctrl + C to stop.")
 
         try:
-            while True:
+            while not session.stopped:
                 audio_data = stream.read(1024)
-                # Enqueue audio data for diarization
-                audio_queue.put(audio_data)
-        except KeyboardInterrupt:
-            stream.stop_stream()
+                # Copy into the ring buffer for diarization
+                audio_buffer.write(audio_data)
+        finally:
             stream.close()
-            p.terminate()
+            audio_buffer.close()
             print("Audio capture ended.")
 
     # Run both Azure transcription and speaker diarization in parallel
     transcription_thread = threading.Thread(target=transcribe_audio_with_azure, args=(api_key, region))
-    audio_capture_thread = threading.Thread(target=capture_audio_to_queue)
+    audio_capture_thread = threading.Thread(target=capture_audio_to_buffer)
 
     transcription_thread.start()
     audio_capture_thread.start()
 
-    # Continuously process audio chunks from the queue
-    while True:
-        if not audio_queue.empty():
-            audio_chunk = audio_queue.get()
-            speaker_info = diarize_audio_with_pyannote(audio_chunk)  # Process the audio chunk for diarization
-            # Combine results (assuming you have collected all transcriptions)
-            final_output = format_output(transcripts, speaker_info)
+    # One diarizer for the whole session keeps speaker labels consistent across chunks
+    diarizer = StreamingDiarizer("pyannote/speaker-diarization-3.0")
+
+    # Feed views over the new audio to the diarizer and print the utterances it has labelled
+    labeller = SpeakerLabeller()
+
+    def process_audio(views):
+        speaker_info = []
+        for view in views:
+            speaker_info += diarizer.feed(view)  # Finalized speaker turns, if any
+        # Label the utterances the diarizer is done with; the others wait for later turns
+        final_output = labeller.label(transcripts, speaker_info, diarizer.committed)
+        if final_output:
             print(final_output)  # Print combined results
 
+    # Block on the ring buffer until Ctrl + C stops the session
+    session.run_buffer(audio_buffer, process_audio)
+
+    transcription_thread.join()  # Returns once the recognizer has stopped and delivered its last utterance
+    audio_capture_thread.join()
+    # Diarize the audio still in the window and print the utterances left
+    final_output = labeller.label(transcripts, diarizer.flush())
+    if final_output:
+        print(final_output)
+
 if __name__ == "__main__":
     main()
@@ -63,29 +63,35 @@ if __name__ == "__main__":
     if transcript_text:
         summarize_text(transcript_text)
 '''
-import pyaudio
 import numpy as np
 import whisper
 import torch
+from capture import MicrophoneCapture
+from rolling_mel import RollingLogMel
+from streaming_whisper import StreamingTranscriber
 
 # Load the Whisper model
 model = whisper.load_model("base")
 
-# Setup PyAudio to capture audio from microphone
+# Capture audio from the microphone
 CHUNK = 1024  # Buffer size
-FORMAT = pyaudio.paInt16  # Audio format (16-bit PCM)
-CHANNELS = 1  # Mono audio
 RATE = 16000  # Sampling rate (Whisper model prefers 16kHz)
 
-# Initialize PyAudio
-p = pyaudio.PyAudio()
+# "rolling": 30 s rolling buffer with incremental log-mel, encoder runs every ENCODE_EVERY seconds
+# "streaming": re-decode the uncommitted tail and print text once two passes agree
+MODE = "rolling"
+ENCODE_EVERY = 2.0  # Seconds of new audio between two encoder runs
 
-# Open microphone stream
-stream = p.open(format=FORMAT,
-                channels=CHANNELS,
-                rate=RATE,
-                input=True,
-                frames_per_buffer=CHUNK)
+# Open the microphone at its native rate, the capture resamples it to 16 kHz
+stream = MicrophoneCapture(sample_rate=RATE, frames_per_buffer=CHUNK)
+
+# Keeps a rolling buffer and only prints text two consecutive passes agree on
+transcriber = StreamingTranscriber(model, sample_rate=RATE)
+
+# Preallocated 30 s buffer; log-mel frames are only computed for the new samples
+rolling_mel = RollingLogMel(n_mels=model.dims.n_mels)
+options = whisper.DecodingOptions(language="en", without_timestamps=True, fp16=model.device.type == "cuda")
+samples_since_encode = 0
 
 print("Recording... Press Ctrl+C to stop.")
 
@@ -93,22 +99,33 @@ try:
     while True:
         # Read audio data from microphone
         data = stream.read(CHUNK)
-        
-        # Convert the audio data to numpy array
-        audio_data = np.frombuffer(data, dtype=np.int16).astype(np.float32) / 32768.0
-        
-        # Whisper prefers a 1D tensor of audio at 16000 Hz
-        audio_tensor = torch.from_numpy(audio_data).unsqueeze(0)
-
-        # Perform transcription using Whisper
-        transcription = model.transcribe(audio_tensor)
 
-        # Print the transcription in real-time
-        print(transcription['text'])
+        if MODE == "rolling":
+            rolling_mel.add(data)
+            samples_since_encode += CHUNK
+            if samples_since_encode < ENCODE_EVERY * RATE:
+                continue
+            samples_since_encode = 0
+
+            # Decode the current window; the line is rewritten until the window is full
+            result = whisper.decode(model, rolling_mel.window().to(model.device), options)
+            if rolling_mel.is_full:
+                print("\r" + result.text)
+                rolling_mel.reset()
+            else:
+                print("\r" + result.text, end="", flush=True)
+        else:
+            # Add it to the rolling buffer, Whisper runs once enough new audio has arrived
+            transcriber.insert_audio(data)
+            transcription = transcriber.process()
+
+            # Print the committed text in real-time
+            if transcription:
+                print(transcription)
 
 except KeyboardInterrupt:
     # When user stops recording
-    print("Recording stopped.")
-    stream.stop_stream()
+    if MODE == "streaming":
+        print(transcriber.finish())
+    print("\nRecording stopped.")
     stream.close()
-    p.terminate()
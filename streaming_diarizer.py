@@ -0,0 +1,131 @@
+import numpy as np
+
+from diarization import SAMPLE_RATE, pcm_to_waveform
+from pipeline_registry import DEFAULT_MODEL_ID, get_pipeline
+
+
+class StreamingDiarizer:
+    """Incremental speaker diarization over a live capture stream.
+
+    Audio is kept in a sliding window. Each time `step` seconds of new audio
+    arrive, the window is diarized, the local speakers are matched against
+    the session speaker centroids, and turns older than `lookahead` seconds
+    are emitted as final. Speaker labels stay the same for the whole session.
+    """
+
+    def __init__(self, model_id=DEFAULT_MODEL_ID, sample_rate=SAMPLE_RATE,
+                 window=10.0, step=2.0, lookahead=3.0, similarity_threshold=0.5):
+        if not 0 < lookahead < window:
+            raise ValueError("lookahead must be positive and shorter than the window")
+        if not 0 < step <= window - lookahead:
+            raise ValueError("step must be positive and fit in the window next to the lookahead")
+
+        self.model_id = model_id
+        self.sample_rate = sample_rate
+        self.window_samples = int(window * sample_rate)
+        self.step_samples = int(step * sample_rate)
+        self.lookahead = lookahead
+        self.similarity_threshold = similarity_threshold
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._chunks = []        # New audio not yet appended to the window
+        self._buffer_start = 0   # Session sample index of self._buffer[0]
+        self._pending = 0        # Samples received since the last diarization run
+        self._committed = 0.0    # Everything before this time (s) has been emitted
+
+        # Running sum of normalized embeddings, one per session speaker
+        self._centroid_sums = []
+
+    @property
+    def speaker_count(self):
+        return len(self._centroid_sums)
+
+    @property
+    def committed(self):
+        """Session time (s) before which every turn has been emitted."""
+        return self._committed
+
+    def feed(self, audio_chunk):
+        """Adds int16 PCM bytes or samples and returns the turns finalized by them."""
+        samples = pcm_to_waveform(audio_chunk, self.sample_rate)["waveform"].numpy()[0]
+        self._chunks.append(samples)
+        self._pending += len(samples)
+
+        if self._pending < self.step_samples:
+            return []
+
+        self._update_window()
+        buffer_end = (self._buffer_start + len(self._buffer)) / self.sample_rate
+        return self._process(buffer_end - self.lookahead)
+
+    def flush(self):
+        """Emits every remaining turn, e.g. when the capture stops."""
+        self._update_window()
+        if len(self._buffer) == 0:
+            return []
+        return self._process((self._buffer_start + len(self._buffer)) / self.sample_rate)
+
+    def _update_window(self):
+        # Append the new audio once per step and keep only the sliding window
+        self._buffer = np.concatenate([self._buffer] + self._chunks)
+        self._chunks = []
+        self._pending = 0
+
+        overflow = len(self._buffer) - self.window_samples
+        if overflow > 0:
+            self._buffer = self._buffer[overflow:]
+            self._buffer_start += overflow
+
+    def _process(self, commit_limit):
+        if commit_limit <= self._committed:
+            return []
+
+        pipeline = get_pipeline(self.model_id)
+        diarization, embeddings = pipeline(
+            pcm_to_waveform(self._buffer, self.sample_rate), return_embeddings=True
+        )
+        labels = self._assign_global_labels(diarization.labels(), embeddings)
+
+        # Emit the part of each turn that lies between the last commit and the new limit
+        offset = self._buffer_start / self.sample_rate
+        turns = []
+        for segment, track, label in diarization.itertracks(yield_label=True):
+            if label not in labels:
+                continue
+            start = max(segment.start + offset, self._committed)
+            end = min(segment.end + offset, commit_limit)
+            if end > start:
+                turns.append({"start": start, "end": end, "speaker": labels[label]})
+
+        self._committed = commit_limit
+        turns.sort(key=lambda turn: turn["start"])
+        return turns
+
+    def _assign_global_labels(self, local_labels, embeddings):
+        """Maps the window's local speaker labels onto the session speakers."""
+        labels = {}
+        taken = set()
+        for local_label, embedding in zip(local_labels, embeddings):
+            norm = np.linalg.norm(embedding)
+            if not np.isfinite(norm) or norm == 0:
+                continue  # Speaker too short to get a usable embedding
+            embedding = embedding / norm
+
+            best, best_similarity = None, self.similarity_threshold
+            for index, centroid_sum in enumerate(self._centroid_sums):
+                if index in taken:
+                    continue  # Two local speakers in one window are never the same person
+                centroid = centroid_sum / np.linalg.norm(centroid_sum)
+                similarity = float(np.dot(centroid, embedding))
+                if similarity >= best_similarity:
+                    best, best_similarity = index, similarity
+
+            if best is None:
+                self._centroid_sums.append(embedding.copy())
+                best = len(self._centroid_sums) - 1
+            else:
+                self._centroid_sums[best] += embedding
+
+            taken.add(best)
+            labels[local_label] = f"SPEAKER_{best:02d}"
+        return labels
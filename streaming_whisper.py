@@ -0,0 +1,127 @@
+import re
+
+import numpy as np
+
+_NON_WORD = re.compile(r"[^\w']+")
+
+
+def _normalize(word):
+    # Compare words without case or punctuation, Whisper changes both between passes
+    return _NON_WORD.sub("", word.lower())
+
+
+class StreamingTranscriber:
+    """Live Whisper captions from a rolling audio buffer with a local-agreement commit policy.
+
+    Each process() call re-decodes only the buffered audio that is not yet
+    committed. Words are committed once two consecutive passes agree on
+    them; the audio before the last committed word is then dropped, so the
+    buffer never holds more than the uncommitted tail plus a short context.
+
+    Usage:
+        transcriber = StreamingTranscriber(model)
+        transcriber.insert_audio(samples)
+        print(transcriber.process())   # Newly committed text, may be empty
+        ...
+        print(transcriber.finish())
+    """
+
+    def __init__(self, model, sample_rate=16000, min_chunk=1.0, max_buffer=15.0, language="en"):
+        self.model = model
+        self.sample_rate = sample_rate
+        self.min_chunk_samples = int(min_chunk * sample_rate)
+        self.max_buffer = max_buffer
+        self.language = language
+
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._buffer_offset = 0.0   # Session time (s) of self._buffer[0]
+        self._new_samples = 0
+        self._previous = []         # Uncommitted (start, end, word) of the last pass
+        self._committed_end = 0.0   # End time of the last committed word
+        self.committed = []         # Every committed (start, end, word) of the session
+
+    def insert_audio(self, audio_data):
+        """Appends int16 PCM bytes or samples to the buffer."""
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            audio_data = np.frombuffer(audio_data, dtype=np.int16)
+        if audio_data.dtype == np.int16:
+            audio_data = audio_data.astype(np.float32) / 32768.0
+        self._buffer = np.concatenate((self._buffer, audio_data))
+        self._new_samples += len(audio_data)
+
+    def process(self):
+        """Re-decodes the uncommitted tail and returns the text committed by this pass."""
+        if self._new_samples < self.min_chunk_samples:
+            return ""
+        self._new_samples = 0
+
+        hypothesis = self._transcribe()
+
+        # Local agreement: commit the longest prefix this pass shares with the previous one
+        agreed = 0
+        while (agreed < len(hypothesis) and agreed < len(self._previous)
+               and _normalize(hypothesis[agreed][2]) == _normalize(self._previous[agreed][2])):
+            agreed += 1
+        newly_committed = hypothesis[:agreed]
+        self._previous = hypothesis[agreed:]
+        self._commit(newly_committed)
+
+        # Bound the buffer when nothing has been agreed on for too long
+        if len(self._buffer) / self.sample_rate > self.max_buffer:
+            if self._previous:
+                # Force the older half of the hypothesis out
+                forced = self._previous[:max(1, len(self._previous) // 2)]
+                self._previous = self._previous[len(forced):]
+                self._commit(forced)
+                newly_committed += forced
+            else:
+                # No words at all, i.e. silence: keep only the most recent audio
+                self._trim(len(self._buffer) - self.min_chunk_samples)
+
+        return "".join(word for _, _, word in newly_committed).strip()
+
+    def finish(self):
+        """Commits whatever the last pass produced, e.g. when the microphone stops."""
+        remaining = self._previous
+        if self._new_samples:
+            remaining = self._transcribe()
+        self._previous = []
+        self._commit(remaining)
+        return "".join(word for _, _, word in remaining).strip()
+
+    @property
+    def text(self):
+        return "".join(word for _, _, word in self.committed).strip()
+
+    def _transcribe(self):
+        if len(self._buffer) == 0:
+            return []
+        # The committed text is passed as a prompt so the tail is decoded in context
+        prompt = "".join(word for _, _, word in self.committed[-50:]) or None
+        result = self.model.transcribe(self._buffer, language=self.language, word_timestamps=True,
+                                       condition_on_previous_text=False, initial_prompt=prompt)
+
+        words = []
+        for segment in result["segments"]:
+            for word in segment.get("words", []):
+                start = self._buffer_offset + word["start"]
+                end = self._buffer_offset + word["end"]
+                # Skip words re-recognized in the context before the commit point
+                if end > self._committed_end:
+                    words.append((start, end, word["word"]))
+        return words
+
+    def _commit(self, words):
+        if not words:
+            return
+        self.committed += words
+        self._committed_end = words[-1][1]
+
+        # Drop the audio before the last committed word
+        self._trim(int((self._committed_end - self._buffer_offset) * self.sample_rate))
+
+    def _trim(self, cut):
+        if cut > 0:
+            self._buffer = self._buffer[cut:]
+            self._buffer_offset += cut / self.sample_rate
+            self._committed_end = max(self._committed_end, self._buffer_offset)
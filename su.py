@@ -3,13 +3,14 @@ import threading
 import queue
 import azure.cognitiveservices.speech as speechsdk
 import pyaudio
-import tempfile
 from datetime import datetime
-import openai
-from pyannote.audio import Pipeline
+from alignment import format_output
+from transcript_store import TranscriptStore
+from summarizer import summarize_transcriptions
+from diarization import diarize_waveform
+from session_runner import SessionRunner
 from dotenv import load_dotenv
 import warnings
-import wave
 import keyboard
 warnings.filterwarnings("ignore")
 
@@ -18,7 +19,8 @@ load_dotenv()
 
 # Global variables
 audio_queue = queue.Queue()  # Initialize the audio queue
-transcripts = []  # To keep track of transcripts
+session = SessionRunner()  # Stop event shared by the capture and diarization threads
+transcripts = TranscriptStore()  # Utterances with numeric offsets, interned speakers and text
 last_transcribed_text = ""  # Variable to track the last transcribed text
 
 # Azure Speech SDK setup
@@ -61,8 +63,8 @@ def conversation_transcriber_transcribed_cb(evt: speechsdk.SpeechRecognitionEven
         # Get the current system time when the transcription is recognized
         pc_time = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         
-        # Store the recognized text, PC time, and speaker ID
-        transcripts.append((evt.result.text, pc_time, evt.result.speaker_id))
+        # Store the recognized text, its offsets and speaker ID; the PC time is only displayed
+        transcripts.append_result(evt.result)
         
         # Check if the recognized text is different from the last one
         if evt.result.text != last_transcribed_text:
@@ -106,61 +108,9 @@ def conversation_transcriber_session_started_cb(evt: speechsdk.SessionEventArgs)
 
 # Diarization function
 def diarize_audio_with_pyannote(audio_chunk):
-    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1",use_auth_token=True)
-    with tempfile.NamedTemporaryFile(suffix=".wav", delete=True) as temp_audio_file:
-        with wave.open(temp_audio_file.name, 'wb') as wf:
-            wf.setnchannels(1)  # Mono channel
-            wf.setsampwidth(2)  # Sample width (bytes)
-            wf.setframerate(16000)  # Frame rate (Hz)
-            wf.writeframes(audio_chunk)  # Write audio data to temp file
-
-        # Apply the pipeline to the saved audio file to obtain speaker segments
-        diarization = pipeline(temp_audio_file.name)
-
-        # Extract speaker segments and labels
-        speaker_info = []
-        for segment, label in diarization.itertracks(yield_label=True):
-            speaker_info.append({
-                "start": segment.start,
-                "end": segment.end,
-                "speaker": label
-            })
-    
-    return speaker_info
-
-# Format and print output
-def format_output(transcripts, speaker_info):
-    output = []
-    for transcript, timestamp, speaker_id in transcripts:
-        # Match the transcript with the speaker based on timing
-        for info in speaker_info:
-            if timestamp >= info["start"] and timestamp <= info["end"]:
-                output.append(f"Speaker {info['speaker']:02}: {transcript}")
-    return "\n".join(output)
-
-
-# Function to summarize transcriptions using OpenAI API
-def summarize_transcriptions(transcripts):
-    # Combine all transcriptions into a single text
-    combined_transcript = "\n".join([f"Speaker {speaker_id}: {text}" for text, _, speaker_id in transcripts])
-
-    # Set up OpenAI API
-    openai.api_key = os.getenv('OPEN_AI_API_KEY')
-    try:
-        # Call the OpenAI API for summarization
-        response = openai.ChatCompletion.create(
-            model="gpt-4o-mini",  # Or use another model like "gpt-4" if available
-            messages=[
-                {"role": "user", "content": f"Please summarize the following conversation:\n\n{combined_transcript}"}
-            ]
-        )
-
-        # Extract the summary from the response
-        summary = response['choices'][0]['message']['content']
-        return summary
-    except Exception as e:
-        print(f"Error during summarization: {e}")
-        return None
+    # Diarize the chunk in memory, no temporary WAV file is written
+    return diarize_waveform(audio_chunk, "pyannote/speaker-diarization-3.1")
+
 
 # Main function to run transcription and diarization
 def main():
@@ -171,13 +121,10 @@ def main():
     audio_config = speechsdk.audio.AudioConfig(use_default_microphone=True)
     conversation_transcriber = speechsdk.transcription.ConversationTranscriber(speech_config=speech_config, audio_config=audio_config)
 
-    transcribing_stop = False
-
     # Define stop callback
     def stop_cb(evt: speechsdk.SessionEventArgs):
         print('CLOSING on {}'.format(evt))
-        nonlocal transcribing_stop
-        transcribing_stop = True
+        session.stop()
 
     # Connect callbacks to the events fired by the conversation transcriber
     conversation_transcriber.transcribed.connect(conversation_transcriber_transcribed_cb)
@@ -198,19 +145,21 @@ def main():
     #audio_capture_thread.start()
     
 
-    # Continuously process audio chunks from the queue
-    while not transcribing_stop:
-        if not audio_queue.empty():
-            audio_chunk = audio_queue.get()
-            speaker_info = diarize_audio_with_pyannote(audio_chunk)  # Process the audio chunk for diarization
-            # Combine results and print
-            final_output = format_output(transcripts, speaker_info)
-            if final_output:  # Print only if there's output
-                print(final_output)  # Print combined results
+    # Diarize each audio chunk and print the combined results
+    def process_audio(audio_chunk):
+        speaker_info = diarize_audio_with_pyannote(audio_chunk)  # Process the audio chunk for diarization
+        # Combine results and print
+        final_output = format_output(transcripts, speaker_info)
+        if final_output:  # Print only if there's output
+            print(final_output)  # Print combined results
+
+    # Block on the queue until the session stops (SDK event, Enter or Ctrl + C)
+    session.stop_on_enter()
+    session.run_queue(audio_queue, process_audio)
 
     conversation_transcriber.stop_transcribing_async()
     print(transcripts)
-    summary = summarize_transcriptions(transcripts)
+    summary = summarize_transcriptions(transcripts, api_key=os.getenv('OPEN_AI_API_KEY'))
     if summary:
         print("\nSummary of the conversation:")
         print(summary)
@@ -0,0 +1,155 @@
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import openai
+
+MODEL = "gpt-4o-mini"
+CHUNK_TOKENS = 6000   # Transcript tokens per map request, well inside the model's context
+MAX_PARALLEL = 4      # Map requests in flight at once
+
+MAP_PROMPT = ("This is part {part} of {parts} of a {kind}. Summarize this part: the topics, "
+              "decisions, dates and action items, and who said what.\n\n{text}")
+REDUCE_PROMPT = ("These are summaries of consecutive parts of a {kind}. Combine them into one summary "
+                 "of the whole {kind}, keeping decisions, dates and action items.\n\n{text}")
+SINGLE_PROMPT = "This is a {kind}. Please summarize the following {kind}:\n\n{text}"
+
+
+def estimate_tokens(text):
+    """Rough token count for English text, about four characters per token."""
+    return len(text) // 4 + 1
+
+
+def speaker_turns(transcripts):
+    """Joins consecutive utterances of the same speaker into 'Speaker X: ...' turns."""
+    turns = []
+    last_speaker = object()
+    for text, _, speaker_id in transcripts:
+        if speaker_id == last_speaker:
+            turns[-1] += " " + text
+        else:
+            turns.append(f"Speaker {speaker_id}: {text}")
+            last_speaker = speaker_id
+    return turns
+
+
+def split_chunks(turns, max_tokens):
+    """Groups turns into chunks of at most max_tokens, splitting only between turns.
+
+    A single turn over the budget is split between words, so its pieces
+    still fit.
+    """
+    chunks = []
+    chunk = []
+    size = 0
+    for turn in turns:
+        pieces = [turn]
+        if estimate_tokens(turn) > max_tokens:
+            pieces = _split_words(turn, max_tokens)
+        for piece in pieces:
+            tokens = estimate_tokens(piece)
+            if chunk and size + tokens > max_tokens:
+                chunks.append("\n".join(chunk))
+                chunk = []
+                size = 0
+            chunk.append(piece)
+            size += tokens
+    if chunk:
+        chunks.append("\n".join(chunk))
+    return chunks
+
+
+def _split_words(text, max_tokens):
+    pieces = []
+    piece = []
+    size = 0
+    for word in text.split(" "):
+        tokens = estimate_tokens(word + " ")
+        if piece and size + tokens > max_tokens:
+            pieces.append(" ".join(piece))
+            piece = []
+            size = 0
+        piece.append(word)
+        size += tokens
+    pieces.append(" ".join(piece))
+    return pieces
+
+
+class TranscriptSummarizer:
+    """Summarizes transcripts of any length with map-reduce over chat-completion calls.
+
+    The transcript is cut into chunks of whole speaker turns that fit
+    chunk_tokens. Up to max_parallel chunks are summarized at once (map),
+    then the partial summaries are combined (reduce); when they are too
+    long to combine in one call they are reduced the same way again. A
+    transcript that fits in one chunk takes a single call, as before.
+
+    api_base points the calls at any chat-completions compatible server.
+
+    Usage:
+        summarizer = TranscriptSummarizer(api_key=os.getenv('AI_API_KEY'))
+        summary = summarizer.summarize(transcripts)
+    """
+
+    def __init__(self, model=MODEL, api_key=None, api_base=None, chunk_tokens=CHUNK_TOKENS,
+                 max_parallel=MAX_PARALLEL):
+        self.model = model
+        self.api_key = api_key
+        self.api_base = api_base
+        self.chunk_tokens = chunk_tokens
+        self.max_parallel = max_parallel
+        self.requests = 0   # Chat-completion calls made, for logging
+        self._lock = threading.Lock()
+
+    def summarize(self, transcripts):
+        """Returns the summary of an iterable of (text, start, speaker_id) rows, or None if it is empty."""
+        transcripts = list(transcripts)
+        if not transcripts:
+            return None
+        # Explicitly inform the model if it's a monologue or dialogue
+        kind = "monologue" if len({speaker_id for _, _, speaker_id in transcripts}) == 1 else "conversation"
+
+        chunks = split_chunks(speaker_turns(transcripts), self.chunk_tokens)
+        if len(chunks) == 1:
+            return self._complete(SINGLE_PROMPT.format(kind=kind, text=chunks[0]))
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            # Map: one summary per chunk, in transcript order
+            summaries = list(executor.map(
+                lambda part: self._complete(MAP_PROMPT.format(part=part[0] + 1, parts=len(chunks), kind=kind,
+                                                              text=part[1])),
+                enumerate(chunks)))
+
+            # Reduce: combine neighbouring summaries until one call can take them all
+            while True:
+                groups = split_chunks(summaries, self.chunk_tokens)
+                if len(groups) == 1:
+                    return self._complete(REDUCE_PROMPT.format(kind=kind, text=groups[0]))
+                if len(groups) == len(summaries):
+                    # Summaries over half the budget each: combine them in pairs so every round shrinks
+                    groups = ["\n".join(summaries[i:i + 2]) for i in range(0, len(summaries), 2)]
+                summaries = list(executor.map(
+                    lambda group: self._complete(REDUCE_PROMPT.format(kind=kind, text=group)), groups))
+
+    def _complete(self, prompt):
+        with self._lock:   # Map calls run on several threads
+            self.requests += 1
+        response = openai.ChatCompletion.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            api_key=self.api_key,
+            api_base=self.api_base,
+        )
+        # The content can be null, e.g. when a content filter stops the answer
+        return response['choices'][0]['message']['content'] or ""
+
+
+def summarize_transcriptions(transcripts, api_key=None, api_base=None, **options):
+    """Summarizes a session's transcripts; prints the error and returns None if the API fails."""
+    summarizer = TranscriptSummarizer(api_key=api_key or os.getenv('AI_API_KEY'),
+                                      api_base=api_base or os.getenv('AI_API_BASE'), **options)
+    try:
+        return summarizer.summarize(transcripts)
+    except Exception as e:
+        print(f"Error during summarization: {e}")
+        return None
@@ -0,0 +1,50 @@
+import pytest
+
+from action_items import ActionItemScanner, find_action_items
+
+
+def test_punctuated_items_end_at_the_sentence():
+    items = ActionItemScanner().scan("Okay. Please send the slides by Friday! Thanks. You must book the room.")
+    assert [item.text for item in items] == ["Please send the slides by Friday!", "You must book the room."]
+    assert [item.trigger for item in items] == ["please", "you must"]
+
+
+def test_unpunctuated_items_are_capped():
+    text = "please " + " ".join(f"word{i}" for i in range(50))
+    items = ActionItemScanner(max_words=10).scan(text)
+    assert items[0].text == "please " + " ".join(f"word{i}" for i in range(9))
+    # The rest has no trigger, so it is not an item
+    assert len(items) == 1
+
+
+def test_item_runs_to_the_end_of_an_unpunctuated_utterance():
+    assert find_action_items("we said please check the numbers") == ["please check the numbers"]
+
+
+def test_multi_word_triggers():
+    scanner = ActionItemScanner(triggers=("make sure to", "make"))
+    items = scanner.scan("Make sure to lock up. Make coffee.")
+    # The longest trigger wins where several start at the same word
+    assert [(item.trigger, item.text) for item in items] == [("make sure to", "Make sure to lock up."),
+                                                             ("make", "Make coffee.")]
+    # A partial phrase does not trigger
+    assert ActionItemScanner(triggers=("make sure to",)).scan("make sure you lock up.") == []
+
+
+def test_items_keep_the_speaker_and_interpolated_times():
+    text = "Hello. Please review it."
+    item, = ActionItemScanner().scan(text, speaker_id="Guest-2", start=10.0, end=12.4)
+    assert item.speaker_id == "Guest-2"
+    assert item.start == pytest.approx(10.0 + 2.4 * text.index("Please") / len(text))
+    assert item.end == pytest.approx(12.4)
+
+
+def test_no_times_without_a_start():
+    item, = ActionItemScanner().scan("please do it.")
+    assert item.start is None and item.end is None
+
+
+@pytest.mark.parametrize("trigger", ["", "   "])
+def test_empty_triggers_are_rejected(trigger):
+    with pytest.raises(ValueError):
+        ActionItemScanner(triggers=("please", trigger))
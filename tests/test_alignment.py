@@ -0,0 +1,55 @@
+import random
+
+from alignment import SpeakerLabeller, SpeakerTimeline
+from transcript_store import TranscriptStore
+
+
+def turn(start, end, speaker):
+    return {"start": start, "end": end, "speaker": speaker}
+
+
+def test_utterance_waits_until_diarized_past_its_end():
+    transcripts = TranscriptStore()
+    transcripts.append("long one", 1.0, 9.0)
+    transcripts.append("short", 9.5, 10.0)
+    labeller = SpeakerLabeller()
+
+    assert labeller.label(transcripts, [turn(0, 2, "A")], 2.0) == ""
+    assert labeller.label(transcripts, [turn(2, 4, "B")], 4.0) == ""
+    # Labelled from every turn it overlaps, not only the last step's
+    assert labeller.label(transcripts, [turn(4, 9.2, "B")], 9.2) == "Speaker B: long one"
+    # None labels what is left, after flush()
+    assert labeller.label(transcripts, [turn(9.2, 10, "A")]) == "Speaker A: short"
+    assert labeller.label(transcripts, []) == ""
+
+
+def test_late_utterances_use_earlier_turns():
+    transcripts = TranscriptStore()
+    labeller = SpeakerLabeller()
+    assert labeller.label(transcripts, [turn(0, 3, "A"), turn(3, 6, "B")], 6.0) == ""
+    # Azure delivered it after the diarizer had moved on
+    transcripts.append("late", 0.5, 2.5)
+    assert labeller.label(transcripts, [], 8.0) == "Speaker A: late"
+
+
+def test_incremental_labels_match_labelling_at_once():
+    rng = random.Random(1)
+    transcripts = TranscriptStore()
+    t = 0.0
+    for i in range(300):
+        duration = rng.uniform(0.5, 8)
+        transcripts.append(f"u{i}", t, t + duration)
+        t += duration + rng.uniform(0, 1)
+    turns = [turn(s, s + 2.0, rng.choice("ABC")) for s in range(0, int(t) + 5, 2)]
+
+    labeller = SpeakerLabeller()
+    lines = []
+    for i in range(0, len(turns), 3):
+        step = turns[i:i + 3]
+        lines.append(labeller.label(transcripts, step, step[-1]["end"]))
+    lines.append(labeller.label(transcripts, []))
+
+    rows = list(transcripts.rows())
+    speakers = SpeakerTimeline(turns).speakers_for([(start, end) for _, start, end, _ in rows])
+    expected = [f"Speaker {speaker}: {text}" for (text, _, _, _), speaker in zip(rows, speakers)]
+    assert "\n".join(line for line in lines if line).split("\n") == expected
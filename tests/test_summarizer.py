@@ -0,0 +1,140 @@
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+pytest.importorskip("openai")
+
+from summarizer import TranscriptSummarizer, speaker_turns, split_chunks, summarize_transcriptions  # noqa: E402
+
+
+class ChatCompletionsServer(ThreadingHTTPServer):
+    """Local stand-in for the chat-completions endpoint.
+
+    Map prompts are answered with "summary <part>", anything else with
+    "final"; `content` overrides the answer. Records every prompt and the
+    most requests it had in flight at once.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, delay=0.05, content=False):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.delay = delay
+        self.content = content
+        self.prompts = []
+        self.in_flight = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    @property
+    def api_base(self):
+        return f"http://127.0.0.1:{self.server_port}/v1"
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        server = self.server
+        assert self.path == "/v1/chat/completions"
+        prompt = json.loads(self.rfile.read(int(self.headers["Content-Length"])))["messages"][0]["content"]
+        with server.lock:
+            server.prompts.append(prompt)
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+        time.sleep(server.delay)
+        with server.lock:
+            server.in_flight -= 1
+
+        part = re.match(r"This is part (\d+) of", prompt)
+        content = f"summary {part.group(1)}" if part else "final"
+        if server.content is not False:
+            content = server.content
+        body = json.dumps({
+            "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "test",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def server():
+    server = ChatCompletionsServer()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def make_transcripts(count):
+    # Two speakers taking turns of three utterances each
+    return [(f"utterance {i} about the budget for next quarter", i * 2.0, f"Guest-{i // 3 % 2 + 1}")
+            for i in range(count)]
+
+
+def make_summarizer(server, **options):
+    return TranscriptSummarizer(api_key="test", api_base=server.api_base, **options)
+
+
+def map_prompts(server):
+    return [prompt for prompt in server.prompts if prompt.startswith("This is part")]
+
+
+def test_short_transcript_takes_one_request(server):
+    summarizer = make_summarizer(server)
+    assert summarizer.summarize(make_transcripts(6)) == "final"
+    assert summarizer.requests == 1
+    assert len(server.prompts) == 1
+    assert server.prompts[0].startswith("This is a conversation.")
+
+
+def test_map_calls_are_bounded(server):
+    transcripts = make_transcripts(300)
+    summarizer = make_summarizer(server, chunk_tokens=300, max_parallel=3)
+    assert summarizer.summarize(transcripts) == "final"
+
+    chunks = split_chunks(speaker_turns(transcripts), 300)
+    assert len(chunks) > 3
+    assert len(map_prompts(server)) == len(chunks)
+    assert summarizer.requests == len(server.prompts) == len(chunks) + 1
+    assert 1 < server.peak <= 3
+
+
+def test_chunks_split_on_speaker_turns(server):
+    transcripts = make_transcripts(300)
+    make_summarizer(server, chunk_tokens=300).summarize(transcripts)
+
+    # Every chunk is whole turns, and together they are the transcript in order
+    lines = []
+    for prompt in sorted(map_prompts(server), key=lambda prompt: int(re.match(r"This is part (\d+)", prompt).group(1))):
+        lines += prompt.split("\n\n", 1)[1].split("\n")
+    assert lines == speaker_turns(transcripts)
+
+
+def test_reduce_gets_the_summaries_in_order(server):
+    make_summarizer(server, chunk_tokens=300, max_parallel=4).summarize(make_transcripts(300))
+
+    parts = len(map_prompts(server))
+    reduce_prompt = server.prompts[-1]
+    assert reduce_prompt.startswith("These are summaries")
+    assert reduce_prompt.split("\n\n", 1)[1] == "\n".join(f"summary {part}" for part in range(1, parts + 1))
+
+
+def test_null_content_does_not_break_the_reduce(server):
+    server.content = None
+    assert make_summarizer(server, chunk_tokens=300).summarize(make_transcripts(60)) == ""
+
+
+def test_connection_error_returns_none(capsys):
+    assert summarize_transcriptions(make_transcripts(6), api_key="test", api_base="http://127.0.0.1:1/v1") is None
+    assert "Error during summarization" in capsys.readouterr().out
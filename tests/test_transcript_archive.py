@@ -0,0 +1,55 @@
+import sqlite3
+
+import pytest
+
+from transcript_archive import TranscriptArchive
+
+
+@pytest.fixture
+def archive(tmp_path):
+    archive = TranscriptArchive(str(tmp_path / "transcripts.db"))
+    yield archive
+    archive.close()
+
+
+def add_session(archive, name, started_at, texts):
+    session_id = archive.start_session(name, started_at)
+    for i, text in enumerate(texts):
+        archive.add(session_id, text, i * 5.0, i * 5.0 + 4, f"Guest-{i % 2 + 1}")
+    archive.flush()
+    return session_id
+
+
+@pytest.mark.parametrize("phrase, expected", [
+    ("follow-up", "Let's schedule a follow-up next week."),
+    ("can't", "I can't make Friday."),
+    ("budget?", "What about the budget?"),
+    ('the "final" numbers', 'Send me the "final" numbers.'),
+])
+def test_punctuation_is_not_query_syntax(archive, phrase, expected):
+    add_session(archive, "standup", 1000.0, ["Let's schedule a follow-up next week.", "I can't make Friday.",
+                                            "What about the budget?", 'Send me the "final" numbers.'])
+    assert [match["text"] for match in archive.search(phrase)] == [expected]
+
+
+def test_words_must_be_next_to_each_other(archive):
+    add_session(archive, "standup", 1000.0, ["follow the plan up", "follow up on it"])
+    assert [match["text"] for match in archive.search("follow up")] == ["follow up on it"]
+
+
+def test_fts_syntax_on_request(archive):
+    add_session(archive, "standup", 1000.0, ["deadline is friday", "deadline is monday"])
+    assert [match["text"] for match in archive.search("deadline NOT friday", fts=True)] == ["deadline is monday"]
+    assert archive.search("deadline NOT friday") == []
+    with pytest.raises(sqlite3.OperationalError):
+        archive.search('"deadline', fts=True)
+
+
+def test_filters(archive):
+    first = add_session(archive, "monday", 1000.0, ["budget review", "budget again"])
+    add_session(archive, "tuesday", 2000.0, ["budget review"])
+
+    assert {match["session"] for match in archive.search("budget", since=1500.0)} == {"tuesday"}
+    assert {match["session"] for match in archive.search("budget", until=1500.0)} == {"monday"}
+    matches = archive.search("budget", session_id=first, speaker="Guest-2")
+    assert [(match["session_id"], match["text"]) for match in matches] == [(first, "budget again")]
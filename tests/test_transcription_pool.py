@@ -0,0 +1,110 @@
+import importlib
+import os
+import signal
+import sys
+import time
+
+import pytest
+
+# Stands in for Whisper in the workers: "transcribes" a chunk to its text after a short delay
+STUB_WHISPER = '''
+import os
+import time
+
+
+class _Model:
+    def transcribe(self, audio):
+        time.sleep(0.3)
+        return {"text": audio}
+
+
+def load_model(model_size):
+    open(os.path.join(os.environ["STUB_WHISPER_READY"], str(os.getpid())), "w").close()
+    return _Model()
+'''
+
+
+@pytest.fixture
+def transcription_pool(tmp_path, monkeypatch):
+    (tmp_path / "whisper.py").write_text(STUB_WHISPER)
+    ready = tmp_path / "ready"
+    ready.mkdir()
+    # Spawned workers get the parent's sys.path and environment
+    monkeypatch.syspath_prepend(str(tmp_path))
+    monkeypatch.setenv("STUB_WHISPER_READY", str(ready))
+    monkeypatch.delitem(sys.modules, "whisper", raising=False)
+    monkeypatch.delitem(sys.modules, "transcription_pool", raising=False)
+    module = importlib.import_module("transcription_pool")
+    module.ready = ready
+    return module
+
+
+def wait_for_workers(ready, count, timeout=30):
+    deadline = time.monotonic() + timeout
+    while len(os.listdir(ready)) < count:
+        assert time.monotonic() < deadline, "workers did not start"
+        time.sleep(0.05)
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGINT") or os.name != "posix", reason="needs POSIX signals")
+def test_drain_survives_sigint(transcription_pool):
+    pool = transcription_pool.TranscriptionPool("tiny", workers=2, max_pending=8)
+    try:
+        finished = []
+        for i in range(2):
+            finished += pool.submit(f"chunk {i}")
+        wait_for_workers(transcription_pool.ready, 2)
+        for i in range(2, 6):
+            finished += pool.submit(f"chunk {i}")
+
+        # What Ctrl+C does to the workers: they are in the same process group as the parent
+        for process in list(pool._executor._processes.values()):
+            os.kill(process.pid, signal.SIGINT)
+
+        finished += pool.drain()
+        assert finished == [f"chunk {i}" for i in range(6)]
+
+        # The pool still works after the stop
+        assert pool.submit("after") + pool.drain() == ["after"]
+    finally:
+        pool.close()
+
+
+class _Done:
+    def __init__(self, text):
+        self.text = text
+
+    def done(self):
+        return True
+
+    def result(self):
+        return self.text
+
+
+class _InterruptedOnce(_Done):
+    """A future whose first wait is interrupted by Ctrl+C."""
+
+    def __init__(self, text):
+        super().__init__(text)
+        self.interrupted = False
+
+    def done(self):
+        return self.interrupted
+
+    def result(self):
+        if not self.interrupted:
+            self.interrupted = True
+            raise KeyboardInterrupt
+        return self.text
+
+
+def test_interrupted_wait_loses_nothing(transcription_pool):
+    pool = transcription_pool.TranscriptionPool("tiny", workers=1, max_pending=1)
+    try:
+        pool._pending.extend([_Done("a"), _InterruptedOnce("b"), _Done("c")])
+        with pytest.raises(KeyboardInterrupt):
+            pool.drain()
+        # "a" was already collected when the wait on "b" was interrupted
+        assert pool.drain() == ["a", "b", "c"]
+    finally:
+        pool.close()
@@ -0,0 +1,325 @@
+"""Persistent archive of transcribed sessions, searchable by phrase, speaker and time.
+
+Usage:
+    python transcript_archive.py search "budget review" --speaker Guest-1
+    python transcript_archive.py search "deadline NOT friday" --fts --since 2024-03-01
+    python transcript_archive.py sessions
+    python transcript_archive.py show 12 --start 600 --end 900
+    python transcript_archive.py import transcripts/*.json
+"""
+import argparse
+import glob
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+DEFAULT_PATH = "transcripts.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    name TEXT,
+    started_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS utterances (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    start REAL NOT NULL,
+    end REAL NOT NULL,
+    speaker TEXT,
+    text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS utterances_session_start ON utterances(session_id, start);
+CREATE INDEX IF NOT EXISTS utterances_speaker ON utterances(speaker, session_id, start);
+
+-- Full-text index over the text column, kept in sync by the triggers below
+CREATE VIRTUAL TABLE IF NOT EXISTS utterances_fts USING fts5(
+    text, content='utterances', content_rowid='id', tokenize='porter unicode61'
+);
+CREATE TRIGGER IF NOT EXISTS utterances_fts_insert AFTER INSERT ON utterances BEGIN
+    INSERT INTO utterances_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS utterances_fts_delete AFTER DELETE ON utterances BEGIN
+    INSERT INTO utterances_fts(utterances_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# Tells the writer thread to commit what it has and exit
+_CLOSE = object()
+
+
+def _connect(path):
+    connection = sqlite3.connect(path, check_same_thread=False)
+    # WAL: searches keep running while the writer commits, and commits do not wait for readers
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.execute("PRAGMA synchronous=NORMAL")
+    return connection
+
+
+class TranscriptArchive:
+    """SQLite archive of utterances with an FTS5 index over their text.
+
+    add() only queues the utterance: a background thread writes the queue
+    in batched transactions, so the live pipeline never waits on the disk.
+    Searches run on their own connection and see everything committed.
+
+    Usage:
+        archive = TranscriptArchive()
+        archive.record(transcripts, name="standup")   # Archives every utterance appended to the store
+        ...
+        archive.close()
+        archive.search("follow up", speaker="Guest-2")
+    """
+
+    def __init__(self, path=DEFAULT_PATH, batch_size=500, flush_interval=1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        self._reader = _connect(path)
+        self._reader.executescript(_SCHEMA)
+        self._reader_lock = threading.Lock()
+
+        self._queue = queue.SimpleQueue()   # Unbounded, put() never blocks
+        self._error = None
+        self.written = 0
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def start_session(self, name=None, started_at=None):
+        """Creates a session and returns its id."""
+        with self._reader_lock:
+            with self._reader:
+                cursor = self._reader.execute("INSERT INTO sessions (name, started_at) VALUES (?, ?)",
+                                              (name, started_at or time.time()))
+            return cursor.lastrowid
+
+    def add(self, session_id, text, start, end=None, speaker=None):
+        """Queues one utterance; start and end are seconds from the start of the session."""
+        if self._error is not None:
+            raise self._error
+        self._queue.put((session_id, start, start if end is None else end, speaker, text))
+
+    def record(self, store, name=None):
+        """Starts a session that archives every utterance appended to a TranscriptStore from now on."""
+        session_id = self.start_session(name)
+        existing = store.subscribe(lambda text, start, end, speaker: self.add(session_id, text, start, end, speaker))
+        for text, start, end, speaker in existing.rows():
+            self.add(session_id, text, start, end, speaker)
+        return session_id
+
+    def flush(self):
+        """Waits until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        while not done.wait(0.5):
+            if not self._thread.is_alive():
+                break
+        if self._error is not None:
+            raise self._error
+
+    def close(self):
+        """Commits what is queued and stops the writer."""
+        if self._thread.is_alive():
+            self._queue.put(_CLOSE)
+            self._thread.join()
+        self._reader.close()
+        if self._error is not None:
+            raise self._error
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def search(self, phrase, speaker=None, session_id=None, since=None, until=None, limit=20, fts=False):
+        """Returns the utterances containing a phrase, best matches first.
+
+        Args:
+            phrase (str): Words to find next to each other, e.g. 'follow-up' or "can't".
+            speaker (str): Only utterances of this speaker.
+            session_id (int): Only utterances of this session.
+            since, until (float): Only sessions started in this range (Unix time).
+            fts (bool): Take phrase as an FTS5 query instead, e.g. 'deadline NOT friday'.
+
+        Returns:
+            list: Dicts with session_id, session, start, end, speaker, text and snippet.
+        """
+        sql = ["""
+            SELECT u.session_id, s.name, u.start, u.end, u.speaker, u.text,
+                   snippet(utterances_fts, 0, '[', ']', '...', 12)
+            FROM utterances_fts
+            JOIN utterances u ON u.id = utterances_fts.rowid
+            JOIN sessions s ON s.id = u.session_id
+            WHERE utterances_fts MATCH ?"""]
+        # Quoted, the text is one phrase and its punctuation is not FTS5 syntax
+        params = [phrase if fts else '"' + phrase.replace('"', '""') + '"']
+        if session_id is not None:
+            # A session's rows are written together, so its rowid range lets FTS5 skip the other sessions
+            sql.append("""AND utterances_fts.rowid BETWEEN (SELECT MIN(id) FROM utterances WHERE session_id = ?)
+                                                   AND (SELECT MAX(id) FROM utterances WHERE session_id = ?)""")
+            params += [session_id, session_id]
+        for condition, value in (("u.speaker = ?", speaker), ("u.session_id = ?", session_id),
+                                 ("s.started_at >= ?", since), ("s.started_at < ?", until)):
+            if value is not None:
+                sql.append("AND " + condition)
+                params.append(value)
+        sql.append("ORDER BY bm25(utterances_fts) LIMIT ?")
+        params.append(limit)
+
+        keys = ("session_id", "session", "start", "end", "speaker", "text", "snippet")
+        return [dict(zip(keys, row)) for row in self._query(" ".join(sql), params)]
+
+    def utterances(self, session_id, start=None, end=None, speaker=None):
+        """Returns a session's utterances in time order, optionally within [start, end) seconds."""
+        sql = "SELECT start, end, speaker, text FROM utterances WHERE session_id = ?"
+        params = [session_id]
+        for condition, value in (("start >= ?", start), ("start < ?", end), ("speaker = ?", speaker)):
+            if value is not None:
+                sql += " AND " + condition
+                params.append(value)
+        rows = self._query(sql + " ORDER BY start", params)
+        return [dict(zip(("start", "end", "speaker", "text"), row)) for row in rows]
+
+    def sessions(self, limit=50):
+        """Returns the most recent sessions with their utterance counts."""
+        rows = self._query("""
+            SELECT s.id, s.name, s.started_at, COUNT(u.id), COUNT(DISTINCT u.speaker)
+            FROM sessions s LEFT JOIN utterances u ON u.session_id = s.id
+            GROUP BY s.id ORDER BY s.started_at DESC LIMIT ?""", (limit,))
+        return [dict(zip(("id", "name", "started_at", "utterances", "speakers"), row)) for row in rows]
+
+    def _query(self, sql, params):
+        with self._reader_lock:
+            return self._reader.execute(sql, params).fetchall()
+
+    def _run(self):
+        connection = _connect(self.path)
+        try:
+            while True:
+                item = self._queue.get()
+                batch = []
+                waiting = []
+                # Commit once a batch is full or flush_interval after its first utterance, whichever comes first
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _CLOSE:
+                        break
+                    if isinstance(item, threading.Event):
+                        waiting.append(item)
+                    else:
+                        batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0, deadline - time.monotonic()) if batch else 0)
+                    except queue.Empty:
+                        break
+
+                if batch:
+                    with connection:
+                        connection.executemany(
+                            "INSERT INTO utterances (session_id, start, end, speaker, text) VALUES (?, ?, ?, ?, ?)",
+                            batch)
+                    self.written += len(batch)
+                for done in waiting:
+                    done.set()
+                if item is _CLOSE:
+                    return
+        except Exception as e:
+            self._error = e
+        finally:
+            connection.close()
+
+
+def _format_time(seconds):
+    return f"{int(seconds // 3600):d}:{int(seconds % 3600 // 60):02d}:{seconds % 60:04.1f}"
+
+
+def _parse_time(value):
+    """Parses a Unix time, a YYYY-MM-DD date or a 'YYYY-MM-DD HH:MM' local time."""
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    for layout in ("%Y-%m-%d", "%Y-%m-%d %H:%M"):
+        try:
+            return time.mktime(time.strptime(value, layout))
+        except ValueError:
+            pass
+    raise argparse.ArgumentTypeError(f"expected YYYY-MM-DD, 'YYYY-MM-DD HH:MM' or Unix time, got {value!r}")
+
+
+def import_results(archive, paths):
+    """Archives batch_transcribe.py JSON results, one session per file."""
+    count = 0
+    for path in paths:
+        with open(path) as f:
+            result = json.load(f)
+        session_id = archive.start_session(os.path.basename(result.get("file", path)), os.path.getmtime(path))
+        for segment in result["segments"]:
+            archive.add(session_id, segment["text"], segment["start"], segment["end"], segment["speaker"])
+        count += len(result["segments"])
+    archive.flush()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db", default=DEFAULT_PATH, help="Archive file")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    search = commands.add_parser("search", help="Full-text search, best matches first")
+    search.add_argument("phrase", help="Words to find next to each other, e.g. follow-up")
+    search.add_argument("--fts", action="store_true", help='Take the phrase as an FTS5 query, e.g. "budget NOT q3"')
+    search.add_argument("--speaker")
+    search.add_argument("--session", type=int)
+    search.add_argument("--since", type=_parse_time, help="Only sessions started from this date on")
+    search.add_argument("--until", type=_parse_time, help="Only sessions started before this date")
+    search.add_argument("--limit", type=int, default=20)
+
+    commands.add_parser("sessions", help="List the most recent sessions")
+
+    show = commands.add_parser("show", help="Print a session's transcript")
+    show.add_argument("session", type=int)
+    show.add_argument("--start", type=float)
+    show.add_argument("--end", type=float)
+    show.add_argument("--speaker")
+
+    importer = commands.add_parser("import", help="Archive batch_transcribe.py JSON results")
+    importer.add_argument("paths", nargs="+", help="JSON files or glob patterns")
+
+    args = parser.parse_args()
+    with TranscriptArchive(args.db) as archive:
+        if args.command == "search":
+            start_time = time.perf_counter()
+            try:
+                matches = archive.search(args.phrase, speaker=args.speaker, session_id=args.session,
+                                         since=args.since, until=args.until, limit=args.limit, fts=args.fts)
+            except sqlite3.OperationalError as e:
+                # With --fts, FTS5 reports query syntax errors, e.g. an unbalanced quote, this way
+                parser.error(f"invalid search query {args.phrase!r}: {e}")
+            elapsed = time.perf_counter() - start_time
+            for match in matches:
+                print(f"[{match['session_id']}:{match['session']} {_format_time(match['start'])}] "
+                      f"{match['speaker']}: {match['snippet']}")
+            print(f"{len(matches)} matches in {elapsed * 1000:.1f} ms")
+        elif args.command == "sessions":
+            for session in archive.sessions():
+                started = time.strftime("%Y-%m-%d %H:%M", time.localtime(session["started_at"]))
+                print(f"{session['id']:>6}  {started}  {session['utterances']:>6} utterances  "
+                      f"{session['speakers']} speakers  {session['name'] or ''}")
+        elif args.command == "show":
+            for utterance in archive.utterances(args.session, args.start, args.end, args.speaker):
+                print(f"{_format_time(utterance['start'])} {utterance['speaker']}: {utterance['text']}")
+        else:
+            paths = sorted({path for pattern in args.paths for path in glob.glob(pattern)})
+            print(f"Archived {import_results(archive, paths)} utterances from {len(paths)} files")
+
+
+if __name__ == "__main__":
+    main()
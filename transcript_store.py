@@ -0,0 +1,162 @@
+import threading
+from array import array
+from bisect import bisect_left
+
+# Azure reports offsets and durations in 100 ns ticks
+TICKS_PER_SECOND = 10_000_000
+
+
+class TranscriptView:
+    """A fixed range of rows of a TranscriptStore, shared with it instead of copied.
+
+    The store only ever appends, so the rows of a view never change while
+    the store keeps growing: a view is a cheap snapshot another thread can
+    read without holding a lock.
+    """
+
+    def __init__(self, store, lo, hi):
+        self._store = store
+        self._lo = lo
+        self._hi = hi
+
+    def __len__(self):
+        return self._hi - self._lo
+
+    def __iter__(self):
+        """Yields (text, start, speaker_id) rows, like the tuples the scripts used to keep."""
+        row = self._store._row
+        for i in range(self._lo, self._hi):
+            yield row(i)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            lo, hi, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("TranscriptView slices cannot have a step")
+            return TranscriptView(self._store, self._lo + lo, self._lo + max(lo, hi))
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("transcript index out of range")
+        return self._store._row(self._lo + index)
+
+    def __repr__(self):
+        return repr(list(self))
+
+    def rows(self):
+        """Yields (text, start, end, speaker_id) rows."""
+        store = self._store
+        for i in range(self._lo, self._hi):
+            yield store._texts[i], store._starts[i], store._ends[i], store.speakers[store._speaker_ids[i]]
+
+    def between(self, start, end):
+        """Returns the utterances starting in [start, end) seconds."""
+        store = self._store
+        if store._in_order:
+            return TranscriptView(store, bisect_left(store._starts, start, self._lo, self._hi),
+                                  bisect_left(store._starts, end, self._lo, self._hi))
+
+        # Utterances were appended out of start order: scan, and copy the matching rows
+        matches = TranscriptStore()
+        for text, row_start, row_end, speaker_id in self.rows():
+            if start <= row_start < end:
+                matches.append(text, row_start, row_end, speaker_id)
+        return matches.snapshot()
+
+    def text(self):
+        return " ".join(self._store._texts[self._lo:self._hi])
+
+
+class TranscriptStore:
+    """Session transcript kept in columns: start and end offsets, interned speakers and text.
+
+    Offsets are float seconds from the start of the session, in array('d')
+    columns; speakers are small ints into `speakers`. Appends are
+    thread-safe (the SDK calls back on its own thread). Iteration, slicing
+    and between() work on a snapshot of the rows present when they are
+    called. As long as utterances arrive in start order, which Azure
+    guarantees within a session, between() is a binary search.
+
+    Usage:
+        transcripts = TranscriptStore()
+        transcripts.append_result(evt.result)
+        for text, start, speaker_id in transcripts.between(60, 120):
+            ...
+    """
+
+    def __init__(self):
+        self._starts = array("d")
+        self._ends = array("d")
+        self._speaker_ids = array("H")
+        self._texts = []
+        self.speakers = []         # Interned speaker ids, indexed by the speaker column
+        self._speaker_index = {}
+        self._in_order = True      # Whether the start column is sorted
+        self._subscribers = []
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._texts)
+
+    def __iter__(self):
+        """Yields (text, start, speaker_id) rows, like the tuples the scripts used to keep."""
+        return iter(self.snapshot())
+
+    def __getitem__(self, index):
+        return self.snapshot()[index]
+
+    def __repr__(self):
+        return repr(self.snapshot())
+
+    def append(self, text, start, end=None, speaker_id=None):
+        """Adds an utterance; start and end are seconds from the start of the session."""
+        with self._lock:
+            index = self._speaker_index.get(speaker_id)
+            if index is None:
+                index = self._speaker_index[speaker_id] = len(self.speakers)
+                self.speakers.append(speaker_id)
+            if self._starts and start < self._starts[-1]:
+                self._in_order = False
+
+            self._starts.append(start)
+            self._ends.append(start if end is None else end)
+            self._speaker_ids.append(index)
+            # The text goes in last: its length is the row count readers see
+            self._texts.append(text)
+            subscribers = self._subscribers
+
+        for callback in subscribers:
+            callback(text, start, start if end is None else end, speaker_id)
+
+    def subscribe(self, callback):
+        """Calls callback(text, start, end, speaker_id) after every later append, on the appending thread.
+
+        Returns a snapshot of the rows already present: each row is either
+        in it or passed to the callback, never both or neither.
+        """
+        with self._lock:
+            # A new list, so an append that already picked up the old one does not call back
+            self._subscribers = self._subscribers + [callback]
+            return self.snapshot()
+
+    def append_result(self, result):
+        """Adds a recognized Azure SpeechRecognitionResult or ConversationTranscriptionResult."""
+        start = result.offset / TICKS_PER_SECOND
+        self.append(result.text, start, start + result.duration / TICKS_PER_SECOND,
+                    getattr(result, "speaker_id", None))
+
+    def snapshot(self):
+        """Returns a view of the rows present now, unaffected by later appends."""
+        return TranscriptView(self, 0, len(self._texts))
+
+    def rows(self):
+        return self.snapshot().rows()
+
+    def between(self, start, end):
+        return self.snapshot().between(start, end)
+
+    def text(self):
+        return self.snapshot().text()
+
+    def _row(self, i):
+        return self._texts[i], self._starts[i], self.speakers[self._speaker_ids[i]]
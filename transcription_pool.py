@@ -0,0 +1,62 @@
+import multiprocessing
+import signal
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import whisper
+
+# The Whisper model of the current worker process
+_worker_model = None
+
+
+def _load_worker_model(model_size):
+    global _worker_model
+    # Ctrl+C reaches the whole process group: only the parent stops, the workers finish what they were given
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_model = whisper.load_model(model_size)
+
+
+def _transcribe(audio):
+    return _worker_model.transcribe(audio)["text"]
+
+
+class TranscriptionPool:
+    """Transcribes audio chunks in worker processes, each with its own Whisper model.
+
+    Results come back in submission order. At most `max_pending` chunks are in
+    flight; submit() waits for the oldest one when that limit is reached, so
+    memory stays bounded when transcription is slower than real time.
+    """
+
+    def __init__(self, model_size, workers=2, max_pending=None):
+        self.max_pending = max_pending or workers * 2
+        self._pending = deque()
+        self._finished = []   # Results taken from _pending but not returned yet
+        # spawn: each worker starts clean instead of forking the capture process and its audio handles
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_load_worker_model,
+            initargs=(model_size,),
+        )
+
+    def submit(self, audio):
+        """Queues a float32 chunk and returns the transcriptions finished so far, in order."""
+        self._pending.append(self._executor.submit(_transcribe, audio))
+        return self._collect(wait_all=False)
+
+    def drain(self):
+        """Waits for every chunk still in flight and returns their transcriptions in order."""
+        return self._collect(wait_all=True)
+
+    def _collect(self, wait_all):
+        # A Ctrl+C can land in any result() wait. Futures leave _pending only once their result is in
+        # _finished, and _finished is only emptied on return, so the next call still returns all of them
+        while self._pending and (wait_all or self._pending[0].done() or len(self._pending) > self.max_pending):
+            self._finished.append(self._pending[0].result())
+            self._pending.popleft()
+        finished, self._finished = self._finished, []
+        return finished
+
+    def close(self):
+        self._executor.shutdown(cancel_futures=True)
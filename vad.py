@@ -0,0 +1,113 @@
+import numpy as np
+
+
+class VoiceActivitySegmenter:
+    """Cuts a live PCM stream into speech utterances and drops the silence.
+
+    Each frame is classed as speech when its energy is `margin_db` above a
+    running estimate of the background noise. An utterance ends after
+    `min_silence` seconds of non-speech, or when it reaches `max_utterance`
+    seconds, whichever comes first. Utterances shorter than `min_speech`
+    seconds (clicks, coughs) are discarded.
+    """
+
+    def __init__(self, sample_rate=16000, frame_ms=30, margin_db=10.0, min_energy_db=-55.0,
+                 min_silence=0.5, min_speech=0.25, max_utterance=15.0, padding=0.2):
+        self.sample_rate = sample_rate
+        self.frame_size = int(sample_rate * frame_ms / 1000)
+        self.margin_db = margin_db
+        self.min_energy_db = min_energy_db
+        self.silence_frames = max(1, int(min_silence * 1000 / frame_ms))
+        self.min_speech_frames = max(1, int(min_speech * 1000 / frame_ms))
+        self.max_frames = max(1, int(max_utterance * 1000 / frame_ms))
+        self.padding_frames = int(padding * 1000 / frame_ms)
+
+        self.noise_db = None           # Running estimate of the background level
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._preroll = []             # Recent silent frames kept to pad the next utterance
+        self._frames = []              # Frames of the current utterance
+        self._speech_frames = 0
+        self._trailing_silence = 0
+
+        # Totals, to see how much audio never reaches the recognizer
+        self.total_frames = 0
+        self.speech_frames = 0
+
+    def feed(self, audio_data):
+        """Adds int16 PCM bytes or samples and returns the utterances completed by them."""
+        if isinstance(audio_data, (bytes, bytearray, memoryview)):
+            audio_data = np.frombuffer(audio_data, dtype=np.int16)
+        if audio_data.dtype == np.int16:
+            audio_data = audio_data.astype(np.float32) / 32768.0
+
+        samples = np.concatenate((self._remainder, audio_data))
+        count = len(samples) // self.frame_size
+        self._remainder = samples[count * self.frame_size:]
+        if count == 0:
+            return []
+
+        # Frame energies for the whole block in one vectorized pass
+        frames = samples[:count * self.frame_size].reshape(count, self.frame_size)
+        energy_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+
+        utterances = []
+        for frame, level in zip(frames, energy_db):
+            utterance = self._add_frame(frame, level)
+            if utterance is not None:
+                utterances.append(utterance)
+        return utterances
+
+    def flush(self):
+        """Returns the utterance in progress, if it is long enough, e.g. when recording stops."""
+        utterance = self._end_utterance()
+        self._remainder = np.zeros(0, dtype=np.float32)
+        return [utterance] if utterance is not None else []
+
+    def _add_frame(self, frame, level):
+        self.total_frames += 1
+        if self.noise_db is None:
+            self.noise_db = level  # Calibrate on the first frame
+        is_speech = level > max(self.noise_db + self.margin_db, self.min_energy_db)
+
+        # Track the noise floor quickly downwards and slowly upwards, even slower during speech
+        if level < self.noise_db:
+            rate = 0.3
+        else:
+            rate = 0.002 if is_speech else 0.02
+        self.noise_db += rate * (level - self.noise_db)
+
+        if not self._frames:
+            if not is_speech:
+                self._preroll.append(frame)
+                if len(self._preroll) > self.padding_frames:
+                    self._preroll.pop(0)
+                return None
+            self._frames = self._preroll + [frame]
+            self._preroll = []
+            self._speech_frames = 1
+            self._trailing_silence = 0
+            return None
+
+        self._frames.append(frame)
+        if is_speech:
+            self._speech_frames += 1
+            self._trailing_silence = 0
+        else:
+            self._trailing_silence += 1
+
+        if self._trailing_silence >= self.silence_frames or len(self._frames) >= self.max_frames:
+            return self._end_utterance()
+        return None
+
+    def _end_utterance(self):
+        frames, speech_frames = self._frames, self._speech_frames
+        # Keep `padding` of the trailing silence, drop the rest
+        trailing = max(0, self._trailing_silence - self.padding_frames)
+        self._frames = []
+        self._speech_frames = 0
+        self._trailing_silence = 0
+        if speech_frames < self.min_speech_frames:
+            return None
+
+        self.speech_frames += speech_frames
+        return np.concatenate(frames[:len(frames) - trailing])
@@ -0,0 +1,212 @@
+import struct
+
+import numpy as np
+import torch
+
+from resampler import StreamingResampler
+
+# Sample dtypes and the scale that brings them to [-1, 1), by (format tag, bits per sample)
+_FORMATS = {
+    (1, 8): (np.uint8, 1 / 128.0),
+    (1, 16): (np.dtype("<i2"), 1 / 32768.0),
+    (1, 32): (np.dtype("<i4"), 1 / 2147483648.0),
+    (3, 32): (np.dtype("<f4"), 1.0),
+    (3, 64): (np.dtype("<f8"), 1.0),
+}
+_EXTENSIBLE = 0xFFFE
+
+
+class AudioSource:
+    """Random access to a recording as mono float32 samples, resampled on the fly.
+
+    Subclasses provide `frames`, `channels`, `sample_rate` and
+    `_decode(first, last)`, which returns the frames in [first, last) as
+    mono float32. Only the blocks covering a requested range are decoded.
+    """
+
+    @property
+    def duration(self):
+        return self.frames / self.sample_rate
+
+    def read(self, start=0.0, end=None, sample_rate=None):
+        """Returns mono float32 samples from start to end seconds, at sample_rate if given."""
+        if sample_rate is None or sample_rate == self.sample_rate:
+            first, last = self._frame_range(start, end)
+            return self._decode(first, last)
+
+        resampler = StreamingResampler(self.sample_rate, sample_rate)
+        end = self.duration if end is None else min(end, self.duration)
+        first_out = int(round(max(0.0, start) * sample_rate))
+        last_out = max(first_out, min(int(round(end * sample_rate)), resampler.output_length(self.frames)))
+
+        # Start early enough to prime the filter, on an input frame that falls exactly on an output frame
+        first_in = int(start * self.sample_rate) - resampler.taps * (1 + resampler.down // resampler.up)
+        first_in = max(0, first_in // resampler.down * resampler.down)
+        skip = first_in * resampler.up // resampler.down
+        last_in = min(self.frames, -(-last_out * resampler.down // resampler.up) + resampler.taps)
+
+        out = self._resample_range(resampler, first_in, last_in, at_end=last_in == self.frames)
+        return out[first_out - skip:last_out - skip]
+
+    def blocks(self, block_seconds=10.0, sample_rate=None):
+        """Yields the whole recording as consecutive mono float32 blocks, at sample_rate if given."""
+        block = max(1, int(block_seconds * self.sample_rate))
+        resampler = None
+        if sample_rate is not None and sample_rate != self.sample_rate:
+            resampler = StreamingResampler(self.sample_rate, sample_rate)
+
+        for first in range(0, self.frames, block):
+            samples = self._decode(first, min(self.frames, first + block))
+            yield resampler.process(samples) if resampler else samples
+        if resampler:
+            tail = resampler.flush()
+            if len(tail):
+                yield tail
+
+    def waveform(self, start=0.0, end=None, sample_rate=16000):
+        """Returns the range as the in-memory {"waveform", "sample_rate"} input pyannote accepts."""
+        samples = self.read(start, end, sample_rate)
+        return {"waveform": torch.from_numpy(samples.reshape(1, -1)), "sample_rate": sample_rate}
+
+    def close(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _frame_range(self, start, end):
+        first = min(self.frames, max(0, int(round(start * self.sample_rate))))
+        last = self.frames if end is None else int(round(end * self.sample_rate))
+        return first, max(first, min(self.frames, last))
+
+    def _resample_range(self, resampler, first, last, at_end, block=160000):
+        parts = []
+        for start in range(first, last, block):
+            parts.append(resampler.process(self._decode(start, min(last, start + block))))
+        if at_end:
+            parts.append(resampler.flush())
+        return np.concatenate(parts) if parts else np.zeros(0, dtype=np.float32)
+
+
+class WavSource(AudioSource):
+    """A PCM or float WAV file memory-mapped for random access to any time range.
+
+    Nothing is decoded up front: view() returns zero-copy slices of the
+    mapped samples, and read() converts (and resamples) only the range
+    asked for, so multi-hour recordings never have to fit in memory.
+
+    Usage:
+        source = WavSource("out.wav")
+        audio = source.read(12.5, 20.0, sample_rate=16000)   # float32 mono
+        diarization = pipeline(source.waveform())
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            format_tag, self.channels, self.sample_rate, bits, offset, size = _parse_header(f)
+
+        if (format_tag, bits) not in _FORMATS:
+            raise ValueError(f"{path}: unsupported WAV encoding (format {format_tag}, {bits} bits), "
+                             "convert it to 16-bit PCM")
+        dtype, self._scale = _FORMATS[(format_tag, bits)]
+        self.dtype = np.dtype(dtype)
+
+        self.frames = size // (self.dtype.itemsize * self.channels)
+        # The whole data chunk as (frames, channels), paged in by the OS on access
+        self.samples = np.memmap(path, dtype=self.dtype, mode="r", offset=offset,
+                                 shape=(self.frames, self.channels))
+
+    def view(self, start=0.0, end=None):
+        """Returns the raw (frames, channels) samples from start to end seconds, without copying."""
+        first, last = self._frame_range(start, end)
+        return self.samples[first:last]
+
+    def close(self):
+        mmap = getattr(self.samples, "_mmap", None)
+        self.samples = None
+        if mmap is not None:
+            mmap.close()
+
+    def _decode(self, first, last):
+        # The one copy of a read: convert (and mix down) only the frames asked for
+        samples = self.samples[first:last]
+        if self.dtype == np.uint8:
+            samples = samples.astype(np.float32) - 128.0
+        else:
+            samples = samples.astype(np.float32)
+        if self.channels > 1:
+            samples = samples.mean(axis=1)
+        else:
+            samples = samples.reshape(-1)
+        if self._scale != 1.0:
+            samples *= self._scale
+        return samples
+
+
+class CompressedSource(AudioSource):
+    """A FLAC or Ogg Opus/Vorbis recording, decoded block by block through soundfile.
+
+    Only the blocks covering a requested range are decoded, after a seek to
+    their first frame, so these files are never decoded whole either.
+    """
+
+    def __init__(self, path):
+        import soundfile as sf  # Only needed for compressed recordings
+
+        self.path = path
+        self._file = sf.SoundFile(path)
+        self.channels = self._file.channels
+        self.sample_rate = self._file.samplerate
+        self.frames = self._file.frames
+
+    def close(self):
+        self._file.close()
+
+    def _decode(self, first, last):
+        if self._file.tell() != first:
+            self._file.seek(first)
+        samples = self._file.read(last - first, dtype="float32", always_2d=True)
+        return samples.mean(axis=1) if self.channels > 1 else samples.reshape(-1)
+
+
+def open_audio(path):
+    """Opens a recording as an AudioSource: WAV files are memory-mapped, FLAC and Ogg are decoded."""
+    if path.lower().endswith((".wav", ".wave")):
+        return WavSource(path)
+    return CompressedSource(path)
+
+
+def _parse_header(f):
+    """Returns (format tag, channels, sample rate, bits, data offset, data size) of a WAV file."""
+    riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+    if riff != b"RIFF" or wave_id != b"WAVE":
+        raise ValueError(f"{f.name}: not a RIFF/WAVE file")
+
+    file_size = f.seek(0, 2)
+    position = 12
+    fmt = None
+    while position + 8 <= file_size:
+        f.seek(position)
+        chunk_id, chunk_size = struct.unpack("<4sI", f.read(8))
+        if chunk_id == b"fmt ":
+            fmt = f.read(chunk_size)
+            format_tag, channels, sample_rate = struct.unpack("<HHI", fmt[:8])
+            bits = struct.unpack("<H", fmt[14:16])[0]
+            if format_tag == _EXTENSIBLE and len(fmt) >= 26:
+                # The real format tag is the start of the sub-format GUID
+                format_tag = struct.unpack("<H", fmt[24:26])[0]
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise ValueError(f"{f.name}: data chunk before fmt chunk")
+            offset = position + 8
+            # Recorders that were killed leave a zero or oversized length, use what is on disk
+            size = chunk_size if 0 < chunk_size <= file_size - offset else file_size - offset
+            return format_tag, channels, sample_rate, bits, offset, size
+        # Chunks are padded to an even length
+        position += 8 + chunk_size + (chunk_size & 1)
+
+    raise ValueError(f"{f.name}: no data chunk")
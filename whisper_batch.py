@@ -0,0 +1,52 @@
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_SAMPLES
+
+
+def transcribe_segments(model, audio, segments, batch_size=16, sample_rate=16000, language="en"):
+    """Transcribes many short segments of one recording with batched Whisper passes.
+
+    Args:
+        model: A loaded Whisper model.
+        audio (np.ndarray | WavSource): The whole recording as mono float32 samples, or a
+            WavSource, in which case only the segments are read from it.
+        segments (list): (start, end, speaker) tuples in seconds.
+        batch_size (int): Number of segments sent through the encoder and decoder together.
+
+    Returns:
+        list: (start, end, speaker, text) tuples in the same order as segments.
+    """
+    texts = [None] * len(segments)
+    clips = []
+    for start, end, speaker in segments:
+        if hasattr(audio, "read"):
+            clips.append(audio.read(start, end, sample_rate))
+        else:
+            clips.append(np.ascontiguousarray(audio[int(start * sample_rate):int(end * sample_rate)], dtype=np.float32))
+
+    # Segments longer than one Whisper window cannot share a batch, transcribe them on their own
+    short = []
+    for index, clip in enumerate(clips):
+        if len(clip) > N_SAMPLES:
+            texts[index] = model.transcribe(clip, language=language)["text"]
+        else:
+            short.append(index)
+
+    # Bucket by length so segments in a batch need a similar number of decoding steps
+    short.sort(key=lambda index: len(clips[index]))
+
+    options = whisper.DecodingOptions(language=language, without_timestamps=True,
+                                      fp16=model.device.type == "cuda")
+    for batch_start in range(0, len(short), batch_size):
+        batch = short[batch_start:batch_start + batch_size]
+        mels = torch.stack([
+            whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(clips[index])),
+                                        n_mels=model.dims.n_mels)
+            for index in batch
+        ]).to(model.device)
+
+        for index, result in zip(batch, whisper.decode(model, mels, options)):
+            texts[index] = result.text
+
+    return [(start, end, speaker, text) for (start, end, speaker), text in zip(segments, texts)]
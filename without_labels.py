@@ -1,35 +1,119 @@
-import pyaudio
 import wave
 import os
+import queue
+import threading
+import numpy as np
 import whisper
 import warnings
+from capture import MicrophoneCapture
+from streaming_whisper import StreamingTranscriber
+from transcription_pool import TranscriptionPool
+from vad import VoiceActivitySegmenter
 # from transformers import BartForConditionalGeneration, BartTokenizer
 "UNLABELLED SPEAKERS"
 # Ignore all warnings
 warnings.filterwarnings("ignore")
 
-def record_chunk(p, stream, file_path, chunk_length=5):
+# How the microphone audio is cut for Whisper:
+#   "vad"       - utterances cut at pauses by voice activity detection
+#   "streaming" - rolling buffer, text committed once two passes agree on it
+#   "chunks"    - fixed 5 s chunks
+MODE = "vad"
+MAX_UTTERANCE_SECONDS = 15
+
+# In "vad" and "chunks" modes, recording runs on its own thread and the audio is transcribed
+# by WORKERS processes (0 records and transcribes in turn); at most QUEUE_DEPTH wait in between
+WORKERS = 2
+QUEUE_DEPTH = 8
+
+def record_chunk(stream, file_path, chunk_length=5):
     
     
     """Records an audio chunk and saves it to a file."""
     frames = []
     for _ in range(0, int(16000 / 1024 * chunk_length)):
         try:
-            data = stream.read(1024, exception_on_overflow=False)
+            data = stream.read(1024)
             frames.append(data)
         except OSError as e:
             print(f"Error while recording: {e}")
     
     wf = wave.open(file_path, 'wb')
     wf.setnchannels(1)
-    wf.setsampwidth(p.get_sample_size(pyaudio.paInt16))
+    wf.setsampwidth(2)  # 16-bit PCM
     wf.setframerate(16000)
     wf.writeframes(b''.join(frames))
     wf.close()
 
-def transcribe_chunk(model, chunk_file):
-    """Transcribes the recorded chunk using the Whisper model."""
-    result = model.transcribe(chunk_file)
+def record_utterances(stream, segmenter, stop_event=None):
+    """Reads the microphone continuously and yields speech utterances, skipping silence."""
+    while stop_event is None or not stop_event.is_set():
+        try:
+            data = stream.read(1024)
+        except OSError as e:
+            print(f"Error while recording: {e}")
+            continue
+        for utterance in segmenter.feed(data):
+            yield utterance
+    # Recording was stopped: the utterance in progress is the last one
+    for utterance in segmenter.flush():
+        yield utterance
+
+def record_chunks(stream, stop_event, chunk_length=5):
+    """Reads the microphone continuously and yields fixed-length float32 chunks."""
+    while not stop_event.is_set():
+        frames = []
+        for _ in range(0, int(16000 / 1024 * chunk_length)):
+            try:
+                frames.append(stream.read(1024))
+            except OSError as e:
+                print(f"Error while recording: {e}")
+        yield np.frombuffer(b''.join(frames), dtype=np.int16).astype(np.float32) / 32768.0
+
+def capture_audio(chunks, audio_queue):
+    """Records on its own thread and queues the audio; it never waits for transcription."""
+    for chunk in chunks:
+        try:
+            audio_queue.put_nowait(chunk)
+        except queue.Full:
+            print("Transcription is falling behind, dropping a chunk.")
+    audio_queue.put(None)  # Tells the consumer that recording has stopped
+
+def transcribe_pipelined(chunks, stop_event, model_size):
+    """Records and transcribes at the same time, printing the transcriptions in order."""
+    pool = TranscriptionPool(model_size, workers=WORKERS)
+    audio_queue = queue.Queue(maxsize=QUEUE_DEPTH)
+    capture_thread = threading.Thread(target=capture_audio, args=(chunks, audio_queue))
+    capture_thread.start()
+
+    transcriptions = []
+    try:
+        while True:
+            chunk = audio_queue.get()
+            if chunk is None:
+                break
+            # Finished transcriptions come back in recording order
+            for transcription in pool.submit(chunk):
+                print(transcription)
+                transcriptions.append(transcription)
+    except KeyboardInterrupt:
+        print("Stopping...")
+        stop_event.set()
+        # Transcribe what was recorded before the stop
+        while True:
+            chunk = audio_queue.get()
+            if chunk is None:
+                break
+            transcriptions += pool.submit(chunk)
+
+    transcriptions += pool.drain()
+    capture_thread.join()
+    pool.close()
+    return "".join(transcription + " " for transcription in transcriptions)
+
+def transcribe_chunk(model, chunk):
+    """Transcribes the recorded chunk (a file path or float32 samples) using the Whisper model."""
+    result = model.transcribe(chunk)
     return result["text"]
 '''def summarize(text, model, tokenizer):
     """Summarizes the input text using the BART model."""
@@ -40,35 +124,69 @@ def transcribe_chunk(model, chunk_file):
 
 def main():
     model_size = "small.en"  # Use a smaller model for better performance if needed
-    model = whisper.load_model(model_size)
+    pipelined = MODE in ("vad", "chunks") and WORKERS > 0
+    # The pipelined mode loads one model per worker process instead
+    model = None if pipelined else whisper.load_model(model_size)
 
-    p = pyaudio.PyAudio()
-    stream = p.open(format=pyaudio.paInt16, channels=1, rate=16000, input=True, frames_per_buffer=4096)
+    # Opened at the device's native rate and resampled to 16 kHz
+    stream = MicrophoneCapture(frames_per_buffer=4096)
     #summarization_model = BartForConditionalGeneration.from_pretrained('facebook/bart-large-cnn')
     #tokenizer = BartTokenizer.from_pretrained('facebook/bart-large-cnn')
 
     accumulated_transcription = ""
+    # Only speech reaches Whisper, cut at pauses and capped in length
+    segmenter = VoiceActivitySegmenter(max_utterance=MAX_UTTERANCE_SECONDS)
+
+    # Captions re-decode only the uncommitted tail of a rolling buffer
+    streaming_transcriber = StreamingTranscriber(model)
 
     try:
-        while True:
-            chunk_file = "temp_chunk.wav"
-            record_chunk(p, stream, chunk_file)
-            transcription = transcribe_chunk(model, chunk_file)
-            print(transcription)
-            os.remove(chunk_file)
-            accumulated_transcription += transcription + " "
+        if pipelined:
+            stop_event = threading.Event()
+            if MODE == "vad":
+                chunks = record_utterances(stream, segmenter, stop_event)
+            else:
+                chunks = record_chunks(stream, stop_event)
+            accumulated_transcription = transcribe_pipelined(chunks, stop_event, model_size)
+            with open("log.txt", "w") as log_file:
+                log_file.write(accumulated_transcription)
+        elif MODE == "vad":
+            for utterance in record_utterances(stream, segmenter):
+                transcription = transcribe_chunk(model, utterance)
+                print(transcription)
+                accumulated_transcription += transcription + " "
+        elif MODE == "streaming":
+            while True:
+                streaming_transcriber.insert_audio(stream.read(1024))
+                transcription = streaming_transcriber.process()
+                if transcription:
+                    print(transcription)
+                    accumulated_transcription += transcription + " "
+        else:
+            while True:
+                chunk_file = "temp_chunk.wav"
+                record_chunk(stream, chunk_file)
+                transcription = transcribe_chunk(model, chunk_file)
+                print(transcription)
+                os.remove(chunk_file)
+                accumulated_transcription += transcription + " "
     except KeyboardInterrupt:
         print("Stopping...")
+        # The pipelined mode has no model here; its chunks are handled by transcribe_pipelined
+        if not pipelined:
+            for utterance in segmenter.flush():
+                accumulated_transcription += transcribe_chunk(model, utterance) + " "
+        if MODE == "streaming":
+            accumulated_transcription += streaming_transcriber.finish() + " "
+        if segmenter.total_frames:
+            print(f"Speech: {100 * segmenter.speech_frames / segmenter.total_frames:.0f}% of the recorded audio")
         with open("log.txt", "w") as log_file:
             log_file.write(accumulated_transcription)
     finally:
         print("Final transcription: " + accumulated_transcription)
         #summary = summarize(accumulated_transcription, summarization_model, tokenizer)
         #print("Summary: " + summary)
-        if stream.is_active():
-            stream.stop_stream()
         stream.close()
-        p.terminate()
 
 if __name__ == "__main__":
     main()